@@ -1,10 +1,18 @@
 """Basic API to interact with the rottentomatoes-python package."""
-from typing import Dict, List, Any
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+from typing import Dict, List, Any, AsyncIterator, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 import rottentomatoes as rt
 
+from . import jobs
 from . import models
 
 app = FastAPI(
@@ -13,6 +21,38 @@ app = FastAPI(
     version = "0.5.12"
 )
 
+# Maximum number of movies fetched at once for a single batch request
+BATCH_CONCURRENCY = 8
+
+# Background job queue, persisted to SQLite
+JOBS_DATABASE = os.environ.get("RT_JOBS_DATABASE", "jobs.sqlite3")
+JOBS_WORKERS = int(os.environ.get("RT_JOBS_WORKERS", 4))
+JOBS_INTERVAL = float(os.environ.get("RT_JOBS_INTERVAL", 0))  # seconds each worker waits between movies
+JOBS_PAGE_SIZE = 100
+
+# Created on startup, so importing the API doesn't touch the database. Stays None,
+# disabling /jobs, if the database can't be opened.
+job_queue: Optional[jobs.JobQueue] = None
+
+logger = logging.getLogger(__name__)
+
+# Every movie fetched by the API, for /stats. None, disabling /stats, without NumPy.
+try:
+    stats_corpus: Optional[rt.corpus.Corpus] = rt.corpus.Corpus()
+except ImportError:
+    stats_corpus = None
+
+
+def record_stats(movie: rt.Movie) -> None:
+    """Add a movie to the stats corpus. Failures are logged, never failing the request."""
+    if stats_corpus is None:
+        return
+
+    try:
+        stats_corpus.add(movie)
+    except Exception:
+        logger.exception(f"Couldn't add {movie.url} to the stats corpus.")
+
 
 def build_movie(movie_name: str = "", force_url: str = "") -> models.MovieAttributes:
     """Construct a dictionary adhering to MovieAttributes."""
@@ -21,11 +61,13 @@ def build_movie(movie_name: str = "", force_url: str = "") -> models.MovieAttrib
     else:
         movie = rt.Movie(movie_title=movie_name)
 
+    record_stats(movie)
+
     return {
         "name": movie.movie_title,
         "synopsis": movie.synopsis,
         "tomatometer": movie.tomatometer,
-        "number_of_reviews": movie.num_of_reviews,
+        "num_of_reviews": movie.num_of_reviews,
         "audience_score": movie.audience_score,
         "weighted_score": movie.weighted_score,
         "genres": movie.genres,
@@ -62,3 +104,169 @@ async def multi_movie_search(movie_name: str) -> models.Movies:
             build_movie(force_url=result.url) for result in results
         ]
     }
+
+
+async def stream_movies(queries: List[models.MovieQuery]) -> AsyncIterator[str]:
+    """
+    Fetch every query concurrently, yielding one JSON line (`MovieResult`) per
+    query in order of completion. A failed query yields an error line instead
+    of ending the stream.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def fetch(index: int, query: models.MovieQuery) -> models.MovieResult:
+        async with semaphore:
+            try:
+                movie = await run_in_threadpool(build_movie, query.name, query.url)
+                return models.MovieResult(index=index, query=query, movie=movie)
+            except Exception as e:
+                return models.MovieResult(index=index, query=query, error=f"{type(e).__name__}: {e}")
+
+    tasks = [asyncio.create_task(fetch(index, query)) for index, query in enumerate(queries)]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            yield result.model_dump_json() + "\n"
+    finally:
+        # Client disconnected, don't keep scraping for nobody
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/movies", tags=["General"])
+async def batch_movie_attributes(queries: List[models.MovieQuery]) -> StreamingResponse:
+    """
+    Get many movies' attributes at once. Each query is a movie name or url. Results
+    are streamed back as newline delimited JSON as soon as each movie is fetched,
+    so they may arrive out of order; use `index` to match them to the request.
+    """
+    return StreamingResponse(stream_movies(queries), media_type="application/x-ndjson")
+
+
+@app.on_event("startup")
+def start_job_workers() -> None:
+    """Start draining the job queue, including jobs left over from a previous run."""
+    global job_queue
+
+    try:
+        queue = jobs.JobQueue(JOBS_DATABASE, workers=JOBS_WORKERS, interval=JOBS_INTERVAL)
+        queue.recover()
+    except (sqlite3.Error, OSError):
+        # Ex. a read-only filesystem, the other endpoints still work
+        logger.exception(f"Can't open the job database at {JOBS_DATABASE}, /jobs is disabled.")
+        return
+
+    queue.start(lambda name, url: build_movie(name, url))
+    job_queue = queue
+
+
+@app.on_event("shutdown")
+def stop_job_workers() -> None:
+    if job_queue is not None:
+        job_queue.stop()
+
+
+def job_status(job_id: str) -> Dict[str, Any]:
+    """The job's status, raising a 503 if jobs are disabled and a 404 if it doesn't exist. Blocks on SQLite."""
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Background jobs are unavailable.")
+
+    status = job_queue.status(job_id)
+
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"No job with ID {job_id}.")
+
+    return status
+
+
+@app.post("/jobs", tags=["Jobs"], status_code=202)
+async def submit_job(job: models.JobRequest) -> models.JobStatus:
+    """
+    Queue a large batch of movie queries to be fetched in the background.
+    Poll `/jobs/{job_id}` for progress and read `/jobs/{job_id}/results`.
+    """
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Background jobs are unavailable.")
+
+    job_id = await run_in_threadpool(job_queue.submit, [(query.name, query.url) for query in job.queries])
+    return await run_in_threadpool(job_status, job_id)
+
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str) -> models.JobStatus:
+    """Progress of a background job."""
+    return await run_in_threadpool(job_status, job_id)
+
+
+@app.get("/jobs/{job_id}/results", tags=["Jobs"])
+async def get_job_results(job_id: str, offset: int = 0, limit: int = JOBS_PAGE_SIZE) -> models.JobResults:
+    """
+    A page of the job's finished results, in the order they finished. Results only
+    appear once fetched, so keep paging with `next_offset` until the job is finished.
+    """
+    await run_in_threadpool(job_status, job_id)
+    results = await run_in_threadpool(job_queue.results, job_id, offset, limit)
+
+    return {
+        "results": results,
+        "next_offset": offset + len(results) if len(results) == limit else None,
+    }
+
+
+@app.get("/jobs/{job_id}/results/stream", tags=["Jobs"])
+async def stream_job_results(job_id: str) -> StreamingResponse:
+    """Every finished result of the job so far as newline delimited JSON, in the order they finished."""
+    await run_in_threadpool(job_status, job_id)
+
+    async def lines() -> AsyncIterator[str]:
+        offset = 0
+        while results := await run_in_threadpool(job_queue.results, job_id, offset, JOBS_PAGE_SIZE):
+            for result in results:
+                yield models.MovieResult(**result).model_dump_json() + "\n"
+            offset += len(results)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/stats", tags=["General"])
+async def movie_stats(
+    field: str = "tomatometer",
+    agg: str = "mean",
+    by: List[str] = Query([]),
+    genre: str | None = None,
+    rating: str | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+) -> models.Stats:
+    """
+    Aggregate statistics over every movie the API has fetched. `field` is one of
+    tomatometer, audience_score, num_of_reviews, year, weighted_score, or gap
+    (audience score minus tomatometer). Group by any of genre, rating, and year
+    by repeating `by`, ex. `/stats?field=gap&agg=median&by=genre&year_min=2000`.
+    """
+    if stats_corpus is None:
+        raise HTTPException(status_code=503, detail="Statistics require NumPy on the server.")
+
+    where = {"genre": genre, "rating": rating, "year": (year_min, year_max)}
+
+    try:
+        result = stats_corpus.aggregate(field, agg, by=by, where=where)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not by:
+        result = {(): result}
+
+    return {
+        "field": field,
+        "agg": agg,
+        "movies": len(stats_corpus),
+        "groups": [
+            {
+                "key": dict(zip(by, key if isinstance(key, tuple) else (key,))),
+                "value": None if math.isnan(value) else value,
+            }
+            for key, value in result.items()
+        ],
+    }
@@ -0,0 +1,307 @@
+"""Persistent job queue for large batches, processed by background worker threads."""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from rottentomatoes.exceptions import TransientError
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL REFERENCES jobs (id),
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated_at REAL,
+    finished_seq INTEGER,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status);
+"""
+
+# Item states. Items move queued -> running -> done | failed, or back to queued to retry.
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Attempts at an item failing with a `TransientError` (ex. rate limiting), or whose
+# worker died while running it, before it's marked failed
+MAX_ATTEMPTS = 3
+
+# Seconds a worker may run an item before it's considered dead and the item is run again
+LEASE_SECONDS = 300
+
+# Seconds before the first retry of a transient failure, doubling with each attempt
+RETRY_BACKOFF = 30
+
+# Takes (name, url) and returns the movie's attributes, raising on failure
+Handler = Callable[[str, str], Dict[str, Any]]
+
+
+class JobQueue:
+    """
+    Jobs and their items live in a SQLite database so queued work survives
+    restarts. Call `start` to launch worker threads that drain the queue. Several
+    processes can share the same database.
+
+    Running items are leased, like `rottentomatoes.crawl.LeaseStore` does, so an
+    item whose worker died is run again once its lease expires.
+    """
+    def __init__(
+        self,
+        path: str,
+        workers: int = 4,
+        interval: float = 0,
+        max_attempts: int = MAX_ATTEMPTS,
+        retry_backoff: float = RETRY_BACKOFF,
+        lease_seconds: float = LEASE_SECONDS
+    ) -> None:
+        """
+        `interval` is the number of seconds each worker waits between items,
+        to spread load on Rotten Tomatoes over time. Items failing with a
+        `TransientError` are retried up to `max_attempts` times in total, after
+        `retry_backoff` seconds, doubling each time.
+        """
+        self.path = path
+        self.workers = workers
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Autocommit connection, closed (rolling back any open transaction) on exit."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def recover(self) -> int:
+        """
+        Queue items again whose lease expired, ex. because the server crashed while
+        running them, and fail those out of attempts. Items still leased by a live
+        worker are left alone. Returns the number of items requeued.
+        """
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire(conn, now)
+            requeued = conn.execute(
+                "UPDATE items SET status = ?, owner = NULL, lease_expires = NULL "
+                "WHERE status = ? AND lease_expires < ?",
+                (QUEUED, RUNNING, now)
+            ).rowcount
+            conn.execute("COMMIT")
+
+        return requeued
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> None:
+        """Fail items whose lease expired on their last attempt, in an open transaction."""
+        expired = conn.execute(
+            "SELECT rowid, job_id FROM items WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (RUNNING, now, self.max_attempts)
+        ).fetchall()
+
+        for row in expired:
+            conn.execute(
+                "UPDATE items SET status = ?, owner = NULL, lease_expires = NULL, error = ?, updated_at = ?, "
+                "finished_seq = (SELECT COALESCE(MAX(finished_seq), 0) + 1 FROM items WHERE job_id = ?) "
+                "WHERE rowid = ?",
+                (FAILED, "Lease expired on every attempt", now, row["job_id"], row["rowid"])
+            )
+
+    def submit(self, queries: List[Tuple[str, str]]) -> str:
+        """Enqueue a job of `(name, url)` queries. Returns the job id."""
+        job_id = uuid.uuid4().hex
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO jobs (id, created_at, total) VALUES (?, ?, ?)",
+                (job_id, time.time(), len(queries))
+            )
+            conn.executemany(
+                "INSERT INTO items (job_id, idx, name, url) VALUES (?, ?, ?, ?)",
+                [(job_id, idx, name, url) for idx, (name, url) in enumerate(queries)]
+            )
+            conn.execute("COMMIT")
+
+        self._wake.set()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Progress counts of a job, or None if it doesn't exist."""
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+
+        status = {state: counts.get(state, 0) for state in (QUEUED, RUNNING, DONE, FAILED)}
+        status.update(
+            id=job_id,
+            created_at=job["created_at"],
+            total=job["total"],
+            finished=status[DONE] + status[FAILED] == job["total"]
+        )
+        return status
+
+    def results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Finished items of a job in the order they finished. New results are only
+        ever appended, so paging with `offset` never skips or repeats an item.
+        """
+        query = "SELECT * FROM items WHERE job_id = ? AND finished_seq IS NOT NULL ORDER BY finished_seq LIMIT ? OFFSET ?"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, (job_id, -1 if limit is None else limit, offset)).fetchall()
+
+        return [
+            {
+                "index": row["idx"],
+                "query": {"name": row["name"], "url": row["url"]},
+                "movie": json.loads(row["result"]) if row["result"] else None,
+                "error": row["error"],
+            }
+            for row in rows
+        ]
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """
+        Atomically lease the oldest item due to run, or whose lease expired, and
+        return it with its attempts (including this one) and lease `owner` token.
+        """
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire(conn, now)
+            row = conn.execute(
+                "SELECT rowid, * FROM items WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_expires < ?) ORDER BY rowid LIMIT 1",
+                (QUEUED, now, RUNNING, now)
+            ).fetchone()
+
+            if row is not None:
+                conn.execute(
+                    "UPDATE items SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE rowid = ?",
+                    (RUNNING, uuid.uuid4().hex, now + self.lease_seconds, now, row["rowid"])
+                )
+                row = conn.execute("SELECT rowid, * FROM items WHERE rowid = ?", (row["rowid"],)).fetchone()
+
+            conn.execute("COMMIT")
+            return row
+
+    def _finish(self, row: sqlite3.Row, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = ?, owner = NULL, lease_expires = NULL, result = ?, error = ?, "
+                "updated_at = ?, finished_seq = (SELECT COALESCE(MAX(finished_seq), 0) + 1 FROM items WHERE job_id = ?) "
+                "WHERE rowid = ? AND owner = ?",
+                (
+                    FAILED if error else DONE,
+                    None if result is None else json.dumps(result),
+                    error,
+                    time.time(),
+                    row["job_id"],
+                    row["rowid"],
+                    row["owner"],
+                )
+            )
+
+    def _retry(self, row: sqlite3.Row, error: str) -> None:
+        """Queue an item again, waiting longer after each attempt."""
+        now = time.time()
+        delay = self.retry_backoff * 2 ** (row["attempts"] - 1)
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = ?, owner = NULL, lease_expires = NULL, error = ?, available_at = ?, "
+                "updated_at = ? WHERE rowid = ? AND owner = ?",
+                (QUEUED, error, now + delay, now, row["rowid"], row["owner"])
+            )
+
+        self._wake.set()
+
+    def process_one(self, handler: Handler) -> bool:
+        """
+        Run the next queued item through `handler`. Returns False if no item was
+        due. Transient failures are retried later, other errors fail the item.
+        """
+        row = self._claim()
+        if row is None:
+            return False
+
+        try:
+            result = handler(row["name"], row["url"])
+        except TransientError as e:
+            if row["attempts"] < self.max_attempts:
+                self._retry(row, f"{type(e).__name__}: {e}")
+            else:
+                self._finish(row, None, f"{type(e).__name__}: {e}")
+        except Exception as e:
+            self._finish(row, None, f"{type(e).__name__}: {e}")
+        else:
+            self._finish(row, result, None)
+
+        return True
+
+    def _work(self, handler: Handler) -> None:
+        while not self._stop.is_set():
+            if not self.process_one(handler):
+                self._wake.wait(timeout=1)
+                self._wake.clear()
+                continue
+
+            if self.interval:
+                self._stop.wait(self.interval)
+
+    def start(self, handler: Handler) -> None:
+        """Launch the worker threads."""
+        self._stop.clear()
+
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(handler,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Signal the workers to exit and wait for their current items to finish."""
+        self._stop.set()
+        self._wake.set()
+
+        for thread in self._threads:
+            thread.join()
+
+        self._threads.clear()
+
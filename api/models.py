@@ -1,10 +1,17 @@
 """Models for the API."""
-from pydantic import ConfigDict, BaseModel, Field
+from pydantic import ConfigDict, BaseModel, Field, model_validator
 
 
 class MovieQuery(BaseModel):
     """Job request, querying for a movie."""
-    name: str = Field(..., title="Name of the movie you're searching for.")
+    name: str = Field("", title="Name of the movie you're searching for.")
+    url: str = Field("", title="Rotten Tomatoes url of the movie, used instead of searching by name.")
+
+    @model_validator(mode="after")
+    def check_name_or_url(self) -> "MovieQuery":
+        if not self.name.strip() and not self.url.strip():
+            raise ValueError("Provide either a name or a url.")
+        return self
 
     # Model configuration
     model_config = ConfigDict(json_schema_extra={"example": {"name": "top gun"}})
@@ -173,3 +180,90 @@ class Movies(BaseModel):
             ]
         }
     })
+
+
+class MovieResult(BaseModel):
+    """Output, one line of a batch response. Exactly one of `movie` and `error` is set."""
+    index: int = Field(..., title="Position of the query in the request.")
+    query: MovieQuery = Field(..., title="The query this result answers.")
+    movie: MovieAttributes | None = Field(None, title="Movie attributes, if the lookup succeeded.")
+    error: str | None = Field(None, title="Why the lookup failed, if it did.")
+
+    # Model configuration
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "index": 1,
+            "query": {"name": "not a real movie", "url": ""},
+            "movie": None,
+            "error": "LookupError: No movies found.",
+        }
+    })
+
+
+class JobRequest(BaseModel):
+    """Job request, a large batch of movie queries processed in the background."""
+    queries: list[MovieQuery] = Field(..., title="Movies to fetch.")
+
+    # Model configuration
+    model_config = ConfigDict(json_schema_extra={
+        "example": {"queries": [{"name": "top gun"}, {"url": "https://www.rottentomatoes.com/m/bad_boys"}]}
+    })
+
+
+class JobStatus(BaseModel):
+    """Output, progress of a background job."""
+    id: str = Field(..., title="Job ID.")
+    created_at: float = Field(..., title="Unix timestamp the job was submitted at.")
+    total: int = Field(..., title="Number of queries in the job.")
+    queued: int = Field(..., title="Queries waiting for a worker.")
+    running: int = Field(..., title="Queries being fetched right now.")
+    done: int = Field(..., title="Queries fetched successfully.")
+    failed: int = Field(..., title="Queries that failed.")
+    finished: bool = Field(..., title="Whether every query is done or failed.")
+
+    # Model configuration
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "id": "5f0c2b9e8f0d4c8e9a1b2c3d4e5f6a7b",
+            "created_at": 1700000000.0,
+            "total": 1000,
+            "queued": 600,
+            "running": 4,
+            "done": 390,
+            "failed": 6,
+            "finished": False,
+        }
+    })
+
+
+class JobResults(BaseModel):
+    """Output, a page of finished results of a background job."""
+    results: list[MovieResult] = Field(..., title="Finished results, in the order they finished.")
+    next_offset: int | None = Field(..., title="Offset of the next page, None if this is the last one so far.")
+
+
+class StatsGroup(BaseModel):
+    """Output, an aggregate over one group of movies."""
+    key: dict[str, str | int | None] = Field(..., title="Value of each grouping field, empty if not grouped.")
+    value: float | None = Field(..., title="Aggregate value, None if no movies in the group had the field.")
+
+
+class Stats(BaseModel):
+    """Output, aggregate statistics over every movie fetched by the API."""
+    field: str = Field(..., title="Aggregated field.")
+    agg: str = Field(..., title="Aggregate function.")
+    movies: int = Field(..., title="Number of distinct movies the API has fetched so far.")
+    groups: list[StatsGroup] = Field(..., title="Aggregate of each group.")
+
+    # Model configuration
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "field": "tomatometer",
+            "agg": "mean",
+            "movies": 1250,
+            "groups": [
+                {"key": {"genre": "Action"}, "value": 61.4},
+                {"key": {"genre": "Comedy"}, "value": 58.9},
+            ],
+        }
+    })
@@ -1,4 +1,8 @@
 from .standalone import *
 from .movie import *
 from . import search
-
+from . import cache
+from . import reviews
+from . import index
+from . import corpus
+from . import snapshots
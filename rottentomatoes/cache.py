@@ -0,0 +1,187 @@
+"""Caches used to avoid repeating upstream requests."""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .corpus import Corpus
+    from .movie import Movie
+
+
+# Seconds a failed lookup is remembered before it's retried upstream
+NEGATIVE_TTL: float = 15 * 60
+
+# Failed lookups remembered at once, the oldest are forgotten first
+NEGATIVE_MAX_ENTRIES = 10_000
+
+
+def _normalize_query(name: str) -> str:
+    """Case and whitespace insensitive key for a search query."""
+    return " ".join(name.lower().split())
+
+
+class NegativeCache:
+    """
+    Remembers lookups that definitively failed (no search results, 404 pages)
+    for `ttl` seconds, up to `max_entries` of them. Transient failures should
+    never be stored here.
+    """
+    def __init__(self, ttl: float = NEGATIVE_TTL, max_entries: int = NEGATIVE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, reason: str = "") -> None:
+        """Record a failed lookup for `key`."""
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            # Re-adding a key moves it to the end, keeping entries in expiry order
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, reason)
+            self._sweep()
+
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def _sweep(self) -> None:
+        """Drop expired entries, which are always the oldest. Call with the lock held."""
+        now = time.monotonic()
+        while self._entries:
+            key = next(iter(self._entries))
+            if self._entries[key][0] > now:
+                break
+            del self._entries[key]
+
+    def get(self, key: str) -> Optional[str]:
+        """The recorded failure reason for `key`, or None if not cached or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, reason = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            return reason
+
+    def discard(self, key: str) -> None:
+        """Forget a failed lookup, ex. after it was found to exist."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every failed lookup."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sweep()
+            return len(self._entries)
+
+
+def search_key(name: str) -> str:
+    """Negative cache key for a search query."""
+    return "search:" + _normalize_query(name)
+
+
+def url_key(url: str) -> str:
+    """Cache key for a page url."""
+    return "url:" + url.strip().rstrip("/")
+
+
+class MovieCache:
+    """
+    Fetched movies keyed by url. Each movie tracks when every field was last
+    extracted, so `refresh_stale` only re-fetches movies with stale volatile
+    fields, ex. scores, and leaves static metadata as is.
+    """
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, corpus: Optional["Corpus"] = None) -> None:
+        """
+        `ttls` overrides `movie.FIELD_TTLS`. If a `corpus.Corpus` is given, it's kept
+        up to date with every movie put in or refreshed, for fast statistics.
+        """
+        self.ttls = ttls
+        self.corpus = corpus
+        self._movies: Dict[str, "Movie"] = {}
+        self._lock = threading.Lock()
+
+    def put(self, movie: "Movie") -> None:
+        with self._lock:
+            self._movies[url_key(movie.url)] = movie
+
+        if self.corpus is not None:
+            self.corpus.add(movie)
+
+    def get(self, url: str) -> Optional["Movie"]:
+        with self._lock:
+            return self._movies.get(url_key(url))
+
+    def stale(self) -> List["Movie"]:
+        """Cached movies with at least one stale field."""
+        with self._lock:
+            movies = list(self._movies.values())
+
+        return [movie for movie in movies if movie.stale_fields(self.ttls)]
+
+    def refresh_stale(self, concurrency: int = 4) -> Dict[str, Union[List[str], Exception]]:
+        """
+        Refresh the stale fields of every stale movie, `concurrency` at a time.
+        Returns each refreshed movie's url mapped to the fields refreshed, or to
+        the exception raised if its refresh failed.
+        """
+        def refresh(movie: "Movie") -> Union[List[str], Exception]:
+            try:
+                refreshed = movie.refresh(movie.stale_fields(self.ttls))
+            except Exception as e:
+                return e
+
+            if self.corpus is not None:
+                self.corpus.add(movie)
+            return refreshed
+
+        stale = self.stale()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return {movie.url: result for movie, result in zip(stale, pool.map(refresh, stale))}
+
+    def save(self, path: str) -> None:
+        """Persist every movie, and when its fields were fetched, to a JSON file."""
+        with self._lock:
+            entries = [
+                {"movie": movie.to_dict(), "fetched_at": movie._fetched_at}
+                for movie in self._movies.values()
+            ]
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+
+    @classmethod
+    def load(
+        cls, path: str, ttls: Optional[Dict[str, float]] = None, corpus: Optional["Corpus"] = None
+    ) -> "MovieCache":
+        """Restore a cache written by `save`."""
+        from .movie import Movie
+
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+
+        movie_cache = cls(ttls, corpus)
+        for entry in entries:
+            movie_cache.put(Movie.from_dict(entry["movie"], entry["fetched_at"]))
+        return movie_cache
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+
+negative_cache = NegativeCache()
@@ -0,0 +1,355 @@
+"""Command line interface, installed as the `rottentomatoes` command."""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+from . import crawl
+from . import snapshots
+from .exceptions import LookupError
+from .movie import fetch_movie
+
+
+# Rows buffered before they're written to a new Parquet part file
+PARQUET_ROWS_PER_FILE = 500
+
+
+def read_queries(lines: Iterable[str]) -> Iterator[str]:
+    """One title or url per line. Blank lines and lines starting with # are skipped."""
+    for line in lines:
+        query = line.strip()
+        if query and not query.startswith("#"):
+            yield query
+
+
+class Checkpoint:
+    """
+    Append-only log of queries already exported. Queries are only recorded
+    once their output is flushed, so a resumed run never loses results.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.completed: Set[str] = set()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.completed.add(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass  # partial line from an interrupted run
+
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __contains__(self, query: str) -> bool:
+        return query in self.completed
+
+    def add(self, queries: List[str]) -> None:
+        if not queries:
+            return
+
+        self._file.write("".join(json.dumps(query) + "\n" for query in queries))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.completed.update(queries)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JSONLWriter:
+    """Writes one JSON object per line, flushing after every record."""
+    def __init__(self, output: TextIO) -> None:
+        self.output = output
+
+    def write(self, query: str, record: Optional[Dict[str, Any]]) -> List[str]:
+        """Write a record (None for a movie that doesn't exist). Returns the queries now flushed."""
+        if record is not None:
+            self.output.write(json.dumps(record) + "\n")
+            self.output.flush()
+
+        return [query]
+
+    def close(self) -> List[str]:
+        return []
+
+
+class ParquetWriter:
+    """
+    Buffers records and writes every `rows_per_file` of them as a new part file
+    of the `directory` dataset. Part files are complete (footer included) before
+    their queries are checkpointed, so an interrupted export never leaves a
+    checkpointed row in an unreadable file.
+    """
+    def __init__(self, directory: str, rows_per_file: int = PARQUET_ROWS_PER_FILE) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet output requires pyarrow, install it with "
+                "`pip install rottentomatoes-python[parquet]`."
+            ) from e
+
+        self._pa = pa
+        self._pq = pq
+        self.schema = pa.schema([
+            ("query", pa.string()),
+            ("movie_title", pa.string()),
+            ("synopsis", pa.string()),
+            ("tomatometer", pa.int64()),
+            ("audience_score", pa.int64()),
+            ("weighted_score", pa.int64()),
+            ("genres", pa.list_(pa.string())),
+            ("rating", pa.string()),
+            ("duration", pa.string()),
+            ("year_released", pa.string()),
+            ("actors", pa.list_(pa.string())),
+            ("directors", pa.list_(pa.string())),
+            ("image", pa.string()),
+            ("url", pa.string()),
+            ("critics_consensus", pa.string()),
+            ("num_of_reviews", pa.int64()),
+        ])
+        self.rows_per_file = rows_per_file
+        self.directory = directory
+
+        os.makedirs(directory, exist_ok=True)
+        self._rows: List[Dict[str, Any]] = []
+        self._queries: List[str] = []
+
+    def write(self, query: str, record: Optional[Dict[str, Any]]) -> List[str]:
+        if record is not None:
+            self._rows.append(record)
+        self._queries.append(query)
+
+        if len(self._rows) >= self.rows_per_file:
+            return self.flush()
+        return []
+
+    def _next_path(self) -> str:
+        parts = [name for name in os.listdir(self.directory) if name.startswith("part-") and name.endswith(".parquet")]
+        part = max((int(name[5:-8]) for name in parts), default=-1) + 1
+        return os.path.join(self.directory, f"part-{part:05d}.parquet")
+
+    def flush(self) -> List[str]:
+        """Write the buffered rows to a new part file. Returns the queries now written."""
+        if self._rows:
+            path = self._next_path()
+            # Hidden until complete, readers skip files starting with a dot
+            temp_path = os.path.join(self.directory, "." + os.path.basename(path) + ".tmp")
+            self._pq.write_table(self._pa.Table.from_pylist(self._rows, schema=self.schema), temp_path)
+            os.replace(temp_path, path)
+
+        flushed, self._rows, self._queries = self._queries, [], []
+        return flushed
+
+    def close(self) -> List[str]:
+        return self.flush()
+
+
+def export(
+    queries: Iterable[str],
+    writer: Any,
+    checkpoint: Optional[Checkpoint] = None,
+    concurrency: int = 4,
+    log: TextIO = sys.stderr,
+) -> Dict[str, int]:
+    """
+    Fetch `queries` with `concurrency` threads, writing each movie as soon as it's
+    fetched. At most `2 * concurrency` movies are held in memory at once, but every
+    query string is kept to skip duplicates, so memory still grows with the input.
+    Queries in `checkpoint` are skipped, and exported ones are added to it. The
+    writer is closed when done, or when interrupted.
+
+    Movies that don't exist are checkpointed and skipped next time. Other errors
+    (ex. rate limiting) aren't, so those queries are retried on the next run.
+    """
+    counts = {"exported": 0, "missing": 0, "failed": 0, "skipped": 0}
+    seen: Set[str] = set()
+    pending: Dict[Future, str] = {}
+
+    def commit(flushed: List[str]) -> None:
+        if checkpoint is not None:
+            checkpoint.add(flushed)
+
+    def collect(done: Iterable[Future]) -> None:
+        for future in done:
+            query = pending.pop(future)
+
+            try:
+                record = {"query": query, **future.result().to_dict()}
+            except LookupError:
+                counts["missing"] += 1
+                print(f"Not found: {query}", file=log)
+                commit(writer.write(query, None))
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"Failed: {query} ({type(e).__name__}: {e})", file=log)
+            else:
+                counts["exported"] += 1
+                commit(writer.write(query, record))
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for query in queries:
+                if query in seen or (checkpoint is not None and query in checkpoint):
+                    counts["skipped"] += 1
+                    continue
+                seen.add(query)
+
+                if len(pending) >= 2 * concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+                pending[pool.submit(fetch_movie, query)] = query
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+    finally:
+        # Also on interruption, so movies already fetched are kept
+        commit(writer.close())
+
+    return counts
+
+
+def _export_command(args: argparse.Namespace) -> int:
+    infile = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+
+    if args.format == "parquet":
+        if args.output == "-":
+            print("Parquet output needs an --output directory.", file=sys.stderr)
+            return 2
+        writer = ParquetWriter(args.output)
+    elif args.output == "-":
+        writer = JSONLWriter(sys.stdout)
+    else:
+        writer = JSONLWriter(open(args.output, "a", encoding="utf-8"))
+
+    checkpoint_path = args.checkpoint
+    if checkpoint_path is None and args.output != "-":
+        checkpoint_path = args.output.rstrip("/\\") + ".checkpoint"
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+
+    try:
+        counts = export(read_queries(infile), writer, checkpoint, concurrency=args.concurrency)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if isinstance(writer, JSONLWriter) and writer.output is not sys.stdout:
+            writer.output.close()
+        if infile is not sys.stdin:
+            infile.close()
+
+    print(", ".join(f"{count} {name}" for name, count in counts.items()), file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+
+def _crawl_command(args: argparse.Namespace) -> int:
+    store_path = args.store or args.output.rstrip("/\\") + ".crawl.sqlite3"
+
+    if args.join:
+        crawl.work(store_path, args.join)
+    else:
+        infile = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        try:
+            crawl.crawl(read_queries(infile), store_path, workers=args.workers, rate=args.rate)
+        finally:
+            if infile is not sys.stdin:
+                infile.close()
+
+    store = crawl.LeaseStore(store_path)
+    counts = store.counts()
+    print(", ".join(f"{count} {name}" for name, count in counts.items()), file=sys.stderr)
+
+    # Only the crawl's coordinator writes the output, once every worker is done
+    if not args.join:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            for result in store.results():
+                if result["movie"] is not None:
+                    outfile.write(json.dumps({"query": result["query"], **result["movie"]}) + "\n")
+
+    return 1 if counts[crawl.FAILED] else 0
+
+
+def _reextract_command(args: argparse.Namespace) -> int:
+    store = snapshots.SnapshotStore(args.store)
+    fields = args.fields.split(",") if args.fields else None
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    try:
+        for record in snapshots.reextract(store, fields=fields, workers=args.workers):
+            outfile.write(json.dumps(record) + "\n")
+    finally:
+        store.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="rottentomatoes", description="Scrape movies from Rotten Tomatoes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser(
+        "export",
+        help="Fetch many movies, streaming them to JSONL or Parquet.",
+        description=(
+            "Fetch every title or url in INPUT (one per line) and stream the movies to OUTPUT. "
+            "Progress is checkpointed, so rerunning an interrupted export resumes where it left off."
+        ),
+    )
+    export_parser.add_argument("input", nargs="?", default="-", help="File of titles or urls, - for stdin (default).")
+    export_parser.add_argument(
+        "-o", "--output", default="-",
+        help="JSONL file to append to, or directory for Parquet. - for stdout (default, JSONL only, no checkpoint)."
+    )
+    export_parser.add_argument("-f", "--format", choices=["jsonl", "parquet"], default="jsonl")
+    export_parser.add_argument("-c", "--concurrency", type=int, default=4, help="Movies fetched at once.")
+    export_parser.add_argument("--checkpoint", help="Checkpoint file, defaults to OUTPUT.checkpoint.")
+    export_parser.set_defaults(handler=_export_command)
+
+    crawl_parser = commands.add_parser(
+        "crawl",
+        help="Fetch many movies with several worker processes sharing a rate limit.",
+        description=(
+            "Fetch every title or url in INPUT with several worker processes, together staying under "
+            "--rate requests per second, then write the movies to OUTPUT as JSONL. Work is tracked in "
+            "a SQLite store on the local disk, so rerunning resumes. More worker processes on the same "
+            "machine can join with --join."
+        ),
+    )
+    crawl_parser.add_argument("input", nargs="?", default="-", help="File of titles or urls, - for stdin (default).")
+    crawl_parser.add_argument("-o", "--output", required=True, help="JSONL file to write the movies to.")
+    crawl_parser.add_argument("-w", "--workers", type=int, default=4, help="Worker processes.")
+    crawl_parser.add_argument("-r", "--rate", type=float, default=2.0, help="Requests per second across all workers.")
+    crawl_parser.add_argument("--store", help="Work store, defaults to OUTPUT.crawl.sqlite3.")
+    crawl_parser.add_argument(
+        "--join", metavar="WORKER_ID", help="Only work on an existing crawl's store, leaving OUTPUT to its coordinator."
+    )
+    crawl_parser.set_defaults(handler=_crawl_command)
+
+    reextract_parser = commands.add_parser(
+        "reextract",
+        help="Extract fields again from stored page snapshots, without fetching.",
+        description=(
+            "Run the current extraction code over the latest snapshot of every movie page in STORE, "
+            "recorded with `rottentomatoes.snapshots.enable`, writing one JSON record per page."
+        ),
+    )
+    reextract_parser.add_argument("store", help="Snapshot store directory.")
+    reextract_parser.add_argument("-o", "--output", default="-", help="JSONL file to write, - for stdout (default).")
+    reextract_parser.add_argument("--fields", help="Comma separated fields to extract, defaults to all.")
+    reextract_parser.add_argument("-w", "--workers", type=int, help="Worker processes, defaults to one per CPU.")
+    reextract_parser.set_defaults(handler=_reextract_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Columnar store of movie scores and categories, for fast aggregate statistics over
+many movies. Requires NumPy, install it with `pip install rottentomatoes-python[stats]`.
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional, checked when a Corpus is created
+    np = None
+
+if TYPE_CHECKING:
+    from .movie import Movie
+
+
+# Numeric columns stored directly. Missing values are NaN.
+NUMERIC_FIELDS = ("tomatometer", "audience_score", "num_of_reviews", "year")
+
+# Columns computed from other columns when queried
+DERIVED_FIELDS = ("weighted_score", "gap")
+
+# Columns that can be grouped by and filtered on
+GROUP_FIELDS = ("genre", "rating", "year")
+
+AGGREGATES = ("count", "sum", "mean", "median", "min", "max", "std")
+
+# Genres are stored as one bit each of a 64 bit mask. Genres seen after the first
+# 64 distinct ones are left out of a movie's genres.
+MAX_GENRES = 64
+
+
+def weighted_scores(tomatometer: "np.ndarray", audience_score: "np.ndarray") -> "np.ndarray":
+    """
+    Vectorized `standalone.weighted_score`. NaN marks a missing score, and the result
+    is NaN only where both are missing.
+    """
+    weighted = np.trunc((2 / 3) * tomatometer + ((1 / 3) * audience_score))
+    weighted = np.where(np.isnan(tomatometer), audience_score, weighted)
+    return np.where(np.isnan(audience_score), tomatometer, weighted)
+
+
+def _year(value: Any) -> float:
+    try:
+        return float(int(value))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _score(value: Any) -> float:
+    return np.nan if value is None else float(value)
+
+
+class Corpus:
+    """
+    Scores, release years, ratings, and genres of many movies in NumPy arrays, one
+    row per movie url. Adding a movie that's already present replaces its row.
+    """
+    def __init__(self, capacity: int = 1024) -> None:
+        if np is None:
+            raise ImportError(
+                "Corpus requires NumPy, install it with `pip install rottentomatoes-python[stats]`."
+            )
+
+        self._size = 0
+        self._columns = {field: np.full(capacity, np.nan) for field in NUMERIC_FIELDS}
+        self._rating = np.full(capacity, -1, dtype=np.int32)
+        self._genres = np.zeros(capacity, dtype=np.uint64)
+        self._rows: Dict[str, int] = {}
+        self.ratings: List[str] = []
+        self.genres: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_movies(cls, movies: Iterable["Movie"]) -> "Corpus":
+        corpus = cls()
+        for movie in movies:
+            corpus.add(movie)
+        return corpus
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._rating)
+        for field, column in self._columns.items():
+            self._columns[field] = np.concatenate([column, np.full(capacity - len(column), np.nan)])
+        self._rating = np.concatenate([self._rating, np.full(capacity - len(self._rating), -1, dtype=np.int32)])
+        self._genres = np.concatenate([self._genres, np.zeros(capacity - len(self._genres), dtype=np.uint64)])
+
+    def _code(self, categories: List[str], value: str) -> int:
+        if value not in categories:
+            categories.append(value)
+        return categories.index(value)
+
+    def add(self, movie: "Movie") -> None:
+        """Add a movie, or update it if its url is already in the corpus."""
+        with self._lock:
+            row = self._rows.get(movie.url)
+            if row is None:
+                if self._size == len(self._rating):
+                    self._grow()
+                row = self._rows[movie.url] = self._size
+                self._size += 1
+
+            self._columns["tomatometer"][row] = _score(movie.tomatometer)
+            self._columns["audience_score"][row] = _score(movie.audience_score)
+            self._columns["num_of_reviews"][row] = _score(movie.num_of_reviews)
+            self._columns["year"][row] = _year(getattr(movie, "year_released", None))
+            self._rating[row] = self._code(self.ratings, movie.rating) if movie.rating else -1
+
+            mask = 0
+            for genre in movie.genres or []:
+                if genre not in self.genres and len(self.genres) >= MAX_GENRES:
+                    continue
+                mask |= 1 << self._code(self.genres, genre)
+            self._genres[row] = mask
+
+    def column(self, field: str) -> "np.ndarray":
+        """A numeric or derived column, one value per movie."""
+        if field in NUMERIC_FIELDS:
+            return self._columns[field][:self._size]
+
+        tomatometer = self._columns["tomatometer"][:self._size]
+        audience_score = self._columns["audience_score"][:self._size]
+
+        if field == "weighted_score":
+            return weighted_scores(tomatometer, audience_score)
+        if field == "gap":
+            return audience_score - tomatometer
+
+        raise ValueError(f"Unknown field {field}, use one of {NUMERIC_FIELDS + DERIVED_FIELDS}.")
+
+    def _genre_matrix(self, rows: "np.ndarray") -> "np.ndarray":
+        """Boolean matrix of whether each of `rows` has each genre."""
+        bits = np.arange(len(self.genres), dtype=np.uint64)
+        return ((self._genres[rows, None] >> bits) & np.uint64(1)).astype(bool)
+
+    def mask(
+        self,
+        genre: Optional[str] = None,
+        rating: Optional[str] = None,
+        year: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        **ranges: Tuple[Optional[float], Optional[float]]
+    ) -> "np.ndarray":
+        """
+        Rows matching every filter given. `year` and keyword arguments naming a
+        column (ex. `tomatometer=(60, None)`) are inclusive `(low, high)` ranges,
+        where None leaves that side open.
+        """
+        selected = np.ones(self._size, dtype=bool)
+
+        if genre is not None:
+            if genre not in self.genres:
+                return np.zeros(self._size, dtype=bool)
+            bit = np.uint64(1 << self.genres.index(genre))
+            selected &= (self._genres[:self._size] & bit) != 0
+
+        if rating is not None:
+            code = self.ratings.index(rating) if rating in self.ratings else -2
+            selected &= self._rating[:self._size] == code
+
+        if year is not None:
+            ranges["year"] = year
+
+        for field, (low, high) in ranges.items():
+            values = self.column(field)
+            if low is not None:
+                selected &= values >= low
+            if high is not None:
+                selected &= values <= high
+
+        return selected
+
+    def aggregate(
+        self,
+        field: str,
+        agg: str = "mean",
+        by: Union[str, Sequence[str], None] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Union[float, Dict[Any, float]]:
+        """
+        Aggregate `field` over the movies matching `where` (keyword arguments of
+        `mask`), ignoring missing values. Without `by` a single value is returned,
+        otherwise a dictionary of group to value. Grouping by several fields gives
+        tuple keys. A movie counts once towards each of its genres.
+
+        ex. `corpus.aggregate("tomatometer", "mean", by=("genre", "year"), where={"year": (1990, 1999)})`
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {agg}, use one of {AGGREGATES}.")
+
+        by = (by,) if isinstance(by, str) else tuple(by or ())
+        unknown = set(by) - set(GROUP_FIELDS)
+        if unknown:
+            raise ValueError(f"Can't group by {sorted(unknown)}, use any of {GROUP_FIELDS}.")
+
+        with self._lock:
+            rows = np.flatnonzero(self.mask(**(where or {})))
+            values = self.column(field)[rows]
+
+            # One code column per grouping field, exploding rows into one per genre
+            codes: List["np.ndarray"] = []
+            for key in by:
+                if key == "genre":
+                    row_idx, genre_codes = np.nonzero(self._genre_matrix(rows))
+                    genre_codes = genre_codes.astype(np.int64)
+                    rows, values = rows[row_idx], values[row_idx]
+                    codes = [column[row_idx] for column in codes] + [genre_codes]
+                elif key == "rating":
+                    codes.append(self._rating[rows].astype(np.int64))
+                else:
+                    codes.append(np.nan_to_num(self._columns["year"][rows], nan=-1).astype(np.int64))
+
+            ratings, genres = list(self.ratings), list(self.genres)
+
+        valid = ~np.isnan(values)
+        values = values[valid]
+        codes = [column[valid] for column in codes]
+
+        if not by:
+            if not len(values):
+                return 0.0 if agg in ("count", "sum") else float("nan")
+            return float(_aggregate(values, np.zeros(len(values), dtype=np.intp), 1, agg)[0])
+
+        # Combine the code columns into one integer key, shifting missing (-1) codes to 0
+        shape = tuple(int(column.max()) + 2 if len(column) else 1 for column in codes)
+        keys, inverse = np.unique(np.ravel_multi_index([column + 1 for column in codes], shape), return_inverse=True)
+        groups = np.stack(np.unravel_index(keys, shape), axis=1) - 1
+        results = _aggregate(values, inverse.reshape(-1), len(keys), agg)
+
+        def label(key: str, code: int) -> Any:
+            if code < 0:
+                return None
+            if key == "genre":
+                return genres[code]
+            if key == "rating":
+                return ratings[code]
+            return int(code)
+
+        return {
+            (label(by[0], int(group[0])) if len(by) == 1 else tuple(map(label, by, map(int, group)))): float(result)
+            for group, result in zip(groups, results)
+        }
+
+    def histogram(self, field: str, bins: Union[int, Sequence[float]] = 10, where: Optional[Dict[str, Any]] = None):
+        """Counts and bin edges of `field` (see `numpy.histogram`), ex. the distribution of weighted scores."""
+        with self._lock:
+            values = self.column(field)[self.mask(**(where or {}))]
+        return np.histogram(values[~np.isnan(values)], bins=bins)
+
+
+def _aggregate(values: "np.ndarray", groups: "np.ndarray", num_groups: int, agg: str) -> "np.ndarray":
+    """Aggregate `values` for each group code in `groups` at once."""
+    counts = np.bincount(groups, minlength=num_groups).astype(float)
+    if agg == "count":
+        return counts
+
+    sums = np.bincount(groups, weights=values, minlength=num_groups)
+    if agg == "sum":
+        return sums
+    if agg == "mean":
+        return sums / counts
+    if agg == "std":
+        squares = np.bincount(groups, weights=values ** 2, minlength=num_groups)
+        return np.sqrt(np.maximum(squares / counts - (sums / counts) ** 2, 0))
+
+    # Order values within each group, groups being contiguous
+    order = np.lexsort((values, groups))
+    ordered = values[order]
+    starts = np.concatenate([[0], np.cumsum(counts[:-1])]).astype(np.intp)
+    ends = starts + counts.astype(np.intp)
+
+    if agg == "min":
+        return ordered[starts]
+    if agg == "max":
+        return ordered[ends - 1]
+
+    # Median, the mean of the middle one or two values
+    low = starts + (counts.astype(np.intp) - 1) // 2
+    high = starts + counts.astype(np.intp) // 2
+    return (ordered[low] + ordered[high]) / 2
@@ -0,0 +1,289 @@
+"""
+Crawl many movies with several worker processes sharing one work store and one
+upstream rate budget. The SQLite store only works on a local disk. Workers on
+other machines need a networked store with the same methods as `LeaseStore`.
+
+Queries are partitioned into shards by consistent hashing, and each worker leases
+items from its own shard before helping with others. Leases expire, so items held
+by a worker that dies are picked up by another one.
+"""
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .exceptions import LookupError
+from .movie import fetch_movie
+
+
+# Seconds a worker may hold an item before another worker can take it
+LEASE_SECONDS = 300
+
+# Items leased by a worker at a time
+LEASE_BATCH = 5
+
+# Attempts at an item before it's marked failed. Movies that don't exist fail at once.
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key TEXT PRIMARY KEY,
+    shard INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS items_shard_status ON items (shard, status);
+CREATE TABLE IF NOT EXISTS budget (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    rate REAL NOT NULL,
+    burst REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+# Upstream requests to fetch one item, the most a worker spends from the budget at once
+MAX_REQUEST_COST = 2
+
+# Item states. Items move pending -> leased -> done | failed, or back to pending to retry.
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+class HashRing:
+    """Consistent hashing of keys onto nodes, so adding a node only moves a fraction of keys."""
+    def __init__(self, nodes: Iterable[Any], replicas: int = 100) -> None:
+        self._ring: List[Tuple[int, Any]] = sorted(
+            (self._hash(f"{node}:{replica}"), node) for node in nodes for replica in range(replicas)
+        )
+        self._points = [point for point, _ in self._ring]
+
+        if not self._ring:
+            raise ValueError("A hash ring needs at least one node.")
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def node_for(self, key: str) -> Any:
+        """The node responsible for `key`."""
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class LeaseStore:
+    """
+    Work items, their results, and the shared rate budget in one SQLite database.
+    It uses WAL mode, which doesn't work over a network filesystem, so keep the
+    database on a local disk shared only by processes on the same machine.
+
+    Any object with the same public methods can stand in for this one, ex. backed by
+    a networked database, to spread workers across machines. Pass it to `work`.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Autocommit connection, closed (rolling back any open transaction) on exit."""
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, items: Iterable[Tuple[str, int]]) -> None:
+        """Add `(key, shard)` items. Keys already in the store keep their state, so crawls can resume."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO items (key, shard) VALUES (?, ?)", items)
+            conn.execute("COMMIT")
+
+    def lease(self, owner: str, shard: Optional[int] = None, limit: int = LEASE_BATCH,
+              lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS) -> List[str]:
+        """
+        Lease up to `limit` available items, preferring `shard`. Pending items and
+        items whose lease expired are available. Items whose lease expired on their
+        last attempt (ex. because they kill their worker) are marked failed instead.
+        """
+        now = time.time()
+        available = "(status = ? OR (status = ? AND lease_expires < ?))"
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE items SET status = ?, owner = NULL, lease_expires = NULL, "
+                "error = 'Lease expired on every attempt' "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, max_attempts)
+            )
+            keys = [row["key"] for row in conn.execute(
+                f"SELECT key FROM items WHERE {available} ORDER BY shard != ?, rowid LIMIT ?",
+                (PENDING, LEASED, now, -1 if shard is None else shard, limit)
+            )]
+            conn.executemany(
+                "UPDATE items SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE key = ?",
+                [(LEASED, owner, now + lease_seconds, key) for key in keys]
+            )
+            conn.execute("COMMIT")
+
+        return keys
+
+    def complete(self, key: str, owner: str, result: Dict[str, Any]) -> None:
+        """Store an item's result, unless its lease was lost to another worker."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = ?, result = ?, error = NULL WHERE key = ? AND owner = ?",
+                (DONE, json.dumps(result), key, owner)
+            )
+
+    def fail(self, key: str, owner: str, error: str, retry: bool = True, max_attempts: int = MAX_ATTEMPTS) -> None:
+        """Release an item to be retried, or mark it failed if it can't be or ran out of attempts."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END, "
+                "error = ?, owner = NULL, lease_expires = NULL WHERE key = ? AND owner = ?",
+                (retry, max_attempts, PENDING, FAILED, error, key, owner)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items in each state."""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return {state: counts.get(state, 0) for state in (PENDING, LEASED, DONE, FAILED)}
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Every finished item, `{"query": key, "movie": ..., "error": ...}`, in the order enqueued."""
+        with self._connect() as conn:
+            for row in conn.execute("SELECT * FROM items WHERE status IN (?, ?) ORDER BY rowid", (DONE, FAILED)):
+                yield {
+                    "query": row["key"],
+                    "movie": json.loads(row["result"]) if row["result"] else None,
+                    "error": row["error"],
+                }
+
+    def set_budget(self, rate: float, burst: float = 1) -> None:
+        """Allow all workers together `rate` requests per second, in bursts of up to `burst`."""
+        if rate <= 0:
+            raise ValueError("The rate must be positive.")
+        if burst < 1:
+            raise ValueError("The burst must be at least 1.")
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO budget VALUES (1, ?, ?, ?, ?)", (rate, burst, burst, time.time())
+            )
+
+    def acquire(self, tokens: float = 1) -> None:
+        """
+        Block until `tokens` requests fit in the shared budget, then spend them.
+        Raises ValueError if `tokens` is more than the budget's burst, which can never fit.
+        """
+        while True:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                budget = conn.execute("SELECT * FROM budget WHERE id = 1").fetchone()
+                if budget is None:
+                    conn.execute("COMMIT")
+                    return  # no budget set, unlimited
+
+                if tokens > budget["burst"]:
+                    conn.execute("COMMIT")
+                    raise ValueError(f"Can't spend {tokens} tokens at once from a budget with a burst of {budget['burst']}.")
+
+                now = time.time()
+                available = min(budget["burst"], budget["tokens"] + (now - budget["updated"]) * budget["rate"])
+                spend = tokens if available >= tokens else 0
+                conn.execute("UPDATE budget SET tokens = ?, updated = ? WHERE id = 1", (available - spend, now))
+                conn.execute("COMMIT")
+
+            if spend:
+                return
+            time.sleep((tokens - available) / budget["rate"])
+
+
+def _request_cost(query: str) -> int:
+    """Upstream requests needed to fetch a query. Titles are searched first."""
+    return 1 if query.startswith(("http://", "https://")) else MAX_REQUEST_COST
+
+
+def work(
+    store: Union[str, LeaseStore], worker_id: str, shard: Optional[int] = None, poll_interval: float = 1
+) -> int:
+    """
+    Fetch items from `store` (a `LeaseStore`, a stand in with the same methods,
+    or the path of a SQLite store) until none are left, preferring `shard`. Run
+    this on each worker process. Returns the number of items this worker finished.
+    """
+    if isinstance(store, str):
+        store = LeaseStore(store)
+    finished = 0
+
+    while True:
+        keys = store.lease(worker_id, shard)
+
+        if not keys:
+            counts = store.counts()
+            if not counts[PENDING] and not counts[LEASED]:
+                return finished
+
+            # Other workers hold the rest, wait in case their leases expire
+            time.sleep(poll_interval)
+            continue
+
+        for key in keys:
+            store.acquire(_request_cost(key))
+
+            try:
+                movie = fetch_movie(key)
+            except LookupError as e:
+                store.fail(key, worker_id, f"LookupError: {e}", retry=False)
+            except Exception as e:
+                store.fail(key, worker_id, f"{type(e).__name__}: {e}")
+            else:
+                store.complete(key, worker_id, movie.to_dict())
+
+            finished += 1
+
+
+def crawl(queries: Iterable[str], store_path: str, workers: int = 4, rate: float = 2.0) -> Dict[str, int]:
+    """
+    Crawl `queries` (titles or urls) with `workers` local processes, together making
+    at most `rate` requests per second. Results stay in the store, read them with
+    `LeaseStore(store_path).results()`. Rerunning with the same store resumes.
+
+    Other processes on the same machine can join by calling `work` on the same store.
+    """
+    store = LeaseStore(store_path)
+    store.set_budget(rate, burst=max(MAX_REQUEST_COST, workers))
+
+    ring = HashRing(range(workers))
+    store.enqueue((query, ring.node_for(query)) for query in queries)
+
+    host = socket.gethostname()
+    processes = [
+        multiprocessing.Process(target=work, args=(store_path, f"{host}-{os.getpid()}-{shard}", shard))
+        for shard in range(workers)
+    ]
+
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    return store.counts()
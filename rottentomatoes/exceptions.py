@@ -2,4 +2,7 @@ class LookupError(Exception):
     pass
 
 class URLCopyError(Exception):
+    pass
+
+class TransientError(Exception):
     pass
\ No newline at end of file
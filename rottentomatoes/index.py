@@ -0,0 +1,256 @@
+"""
+Local, persistent index of movie titles, used to resolve queries without searching
+Rotten Tomatoes. Disabled by default, call `enable` to start recording and using it.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .movie import Movie
+    from .search import SearchListing
+
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rottentomatoes", "index.sqlite3")
+
+# Minimum trigram similarity (0 to 1) for a fuzzy match
+MIN_SIMILARITY = 0.6
+
+# A fuzzy match must beat the runner up by this much to be unambiguous
+MIN_MARGIN = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    year TEXT,
+    trigram_count INTEGER NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS titles_normalized ON titles (normalized);
+CREATE TABLE IF NOT EXISTS trigrams (
+    trigram TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (trigram, url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS queries (
+    normalized TEXT PRIMARY KEY,
+    url TEXT NOT NULL
+);
+"""
+
+
+def normalize(title: str) -> str:
+    """Lowercase, accent and punctuation free form of a title, ex. "Amélie & Co" -> "amelie and co"."""
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    title = title.lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^\w\s]", " ", title).split())
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Character trigrams of a normalized title, padded so short words still match."""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_numeral(word: str) -> bool:
+    """Whether a word is a number or a roman numeral up to 39, ex. a sequel's "2" or "iv"."""
+    return word.isdigit() or (word != "" and re.fullmatch(r"x{0,3}(ix|iv|v?i{0,3})", word) is not None)
+
+
+def typo_of(query: str, title: str) -> bool:
+    """
+    Whether normalized `query` could be a typo of normalized `title`. They must
+    have the same words, except for misspellings that don't change a number or
+    roman numeral, or a plural, ex. "toy story 2" isn't a typo of "toy story 3"
+    and "alien" isn't one of "aliens".
+    """
+    query_words, title_words = query.split(), title.split()
+    if len(query_words) != len(title_words):
+        return False
+
+    for query_word, title_word in zip(query_words, title_words):
+        if query_word == title_word:
+            continue
+        if _is_numeral(query_word) or _is_numeral(title_word):
+            return False
+        if query_word + "s" == title_word or title_word + "s" == query_word:
+            return False
+
+    return True
+
+
+def split_year(query: str) -> Tuple[str, Optional[str]]:
+    """Separate a trailing release year from a query, ex. "top gun (1986)" -> ("top gun", "1986")."""
+    match = re.match(r"^(.*?)\s*\(?((?:18|19|20)\d\d)\)?\s*$", query)
+    if match and match.group(1).strip():
+        return match.group(1), match.group(2)
+    return query, None
+
+
+class TitleIndex:
+    """Titles and resolved queries, stored in a SQLite database at `path`."""
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def add(self, url: str, title: str, year: Optional[str] = None) -> None:
+        """Add or update a title."""
+        normalized = normalize(title)
+        url = url.strip().rstrip("/")
+        if not url or not normalized:
+            return
+
+        grams = trigrams(normalized)
+
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM trigrams WHERE url = ?", (url,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?, ?, ?)",
+                (url, title, normalized, year, len(grams), time.time())
+            )
+            self._conn.executemany("INSERT INTO trigrams VALUES (?, ?)", [(gram, url) for gram in grams])
+
+    def add_query(self, query: str, url: str) -> None:
+        """Remember the url a search query resolved to."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?)", (normalize(query), url.strip().rstrip("/"))
+            )
+
+    def lookup(self, query: str, year: Optional[str] = None) -> Optional[str]:
+        """
+        Url of the movie `query` refers to, or None if it's unknown or ambiguous. A
+        trailing year in the query, or `year`, restricts matches to that release year.
+
+        Queries resolved by a previous search are reused as is. Otherwise an exact
+        title match wins, falling back to the most similar title by trigrams that
+        the query could be a typo of (see `typo_of`).
+        """
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT url FROM queries WHERE normalized = ?", (normalize(query),)
+            ).fetchone()
+            if known:
+                return known[0]
+
+            if year is None:
+                query, year = split_year(query)
+            normalized = normalize(query)
+            if not normalized:
+                return None
+
+            exact = self._conn.execute(
+                "SELECT url, year FROM titles WHERE normalized = ?", (normalized,)
+            ).fetchall()
+            exact = [url for url, title_year in exact if year is None or title_year == year]
+            if exact:
+                return exact[0] if len(exact) == 1 else None
+
+            # Titles sharing too few trigrams can't reach MIN_SIMILARITY, skip them in SQL
+            grams = trigrams(normalized)
+            candidates = self._conn.execute(
+                f"SELECT t.url, t.normalized, t.year, t.trigram_count, COUNT(*) FROM trigrams g "
+                f"JOIN titles t ON t.url = g.url WHERE g.trigram IN ({', '.join('?' * len(grams))}) "
+                f"GROUP BY t.url HAVING COUNT(*) >= ?",
+                [*grams, math.ceil(MIN_SIMILARITY * len(grams))]
+            ).fetchall()
+
+        # Fuzzy matches only forgive typos. A query missing words of a longer title,
+        # ex. "bad boys" of "Bad Boys II", or naming another sequel is left to a search.
+        scores = sorted(
+            (
+                (shared / (len(grams) + trigram_count - shared), url)
+                for url, title, title_year, trigram_count, shared in candidates
+                if (year is None or title_year == year) and typo_of(normalized, title)
+            ),
+            reverse=True
+        )
+
+        if not scores or scores[0][0] < MIN_SIMILARITY:
+            return None
+        if len(scores) > 1 and scores[0][0] - scores[1][0] < MIN_MARGIN:
+            return None
+        return scores[0][1]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# The index in use, None when disabled
+title_index: Optional[TitleIndex] = None
+
+
+def enable(path: str = DEFAULT_PATH) -> TitleIndex:
+    """Record every movie and search result seen in the index at `path`, and resolve queries with it."""
+    global title_index
+    disable()
+    title_index = TitleIndex(path)
+    return title_index
+
+
+def disable() -> None:
+    """Stop using the index."""
+    global title_index
+    if title_index is not None:
+        title_index.close()
+        title_index = None
+
+
+def record_listings(listings: Iterable["SearchListing"]) -> None:
+    """Index search results that are valid movies, if the index is enabled."""
+    if title_index is None:
+        return
+
+    for listing in listings:
+        if listing.is_movie and listing.has_tomatometer and listing.title:
+            title_index.add(listing.url, listing.title, listing.year)
+
+
+def record_movie(movie: "Movie") -> None:
+    """Index a fetched movie, if the index is enabled."""
+    if title_index is not None and movie.url:
+        title_index.add(movie.url, movie.movie_title, movie.year_released)
+
+
+def record_query(query: str, url: str) -> None:
+    """Remember what a search query resolved to, if the index is enabled."""
+    if title_index is not None:
+        title_index.add_query(query, url)
+
+
+def resolve(query: str) -> Optional[str]:
+    """Url for `query` from the index, None if it's disabled or the query can't be resolved offline."""
+    if title_index is None:
+        return None
+    return title_index.lookup(query)
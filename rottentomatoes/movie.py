@@ -1,6 +1,55 @@
 """Contains classes that auto fetch all attributes."""
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from . import index
 from . import standalone
 
+
+# Movie attributes and how to extract each from a movie page, in attribute order.
+# Shared by `Movie` and `snapshots.reextract`, so both always extract the same way.
+EXTRACTORS: Dict[str, Callable[[str], Any]] = {
+    "movie_title": lambda content: standalone.movie_title("", content=content),
+    "synopsis": lambda content: standalone.synopsis("", content=content),
+    "tomatometer": lambda content: standalone.tomatometer("", content=content),
+    "audience_score": lambda content: standalone.audience_score("", content=content),
+    "weighted_score": lambda content: standalone.weighted_score("", content=content),
+    "genres": lambda content: standalone.genres("", content=content),
+    "rating": lambda content: standalone.rating("", content=content),
+    "duration": lambda content: standalone.duration("", content=content),
+    "year_released": lambda content: standalone.year_released("", content=content),
+    "actors": lambda content: standalone.actors("", content=content),
+    "directors": lambda content: standalone.directors("", max_directors=5, content=content),
+    "image": lambda content: standalone.image("", content=content),
+    "url": lambda content: standalone.url("", content=content),
+    "critics_consensus": lambda content: standalone.critics_consensus("", content=content),
+    "num_of_reviews": lambda content: standalone.num_of_reviews("", content=content),
+}
+
+# Fields that change after release, ex. as reviews come in
+VOLATILE_FIELDS = ("tomatometer", "audience_score", "weighted_score", "num_of_reviews")
+
+# Fields that are only consistent with each other when refreshed together
+SCORE_FIELDS = ("tomatometer", "audience_score", "weighted_score")
+
+# Seconds until a field is considered stale. Fields not listed never go stale.
+FIELD_TTLS: Dict[str, float] = {field: 24 * 60 * 60 for field in VOLATILE_FIELDS}
+
+
+def _score_fields(content: str) -> Dict[str, Any]:
+    """All volatile fields, parsing the scoreboard only once."""
+    details = standalone._get_score_details(content)
+    t_score = details["tomatometerScore"] or None
+    a_score = details["audienceScore"] or None
+
+    return {
+        "tomatometer": t_score,
+        "audience_score": a_score,
+        "weighted_score": standalone._weighted_score(t_score, a_score),
+        "num_of_reviews": details["num_of_reviews_tomatometer"] or None,
+    }
+
+
 class Movie:
     """
     Accepts the name of a movie and automatically fetches all attributes.
@@ -15,21 +64,70 @@ class Movie:
         else:
             content = standalone._request(movie_name=movie_title)
 
-        self.movie_title = standalone.movie_title(movie_title, content=content)
-        self.synopsis = standalone.synopsis(movie_title, content=content)
-        self.tomatometer = standalone.tomatometer(self.movie_title, content=content)
-        self.audience_score = standalone.audience_score(self.movie_title, content=content)
-        self.weighted_score = standalone.weighted_score(self.movie_title, content=content)
-        self.genres = standalone.genres(self.movie_title, content=content)
-        self.rating = standalone.rating(self.movie_title, content=content)
-        self.duration = standalone.duration(self.movie_title, content=content)
-        self.year_released = standalone.year_released(self.movie_title, content=content)
-        self.actors = standalone.actors(self.movie_title, content=content)
-        self.directors = standalone.directors(self.movie_title, max_directors=5, content=content)
-        self.image = standalone.image(self.movie_title, content=content)
-        self.url = standalone.url(self.movie_title, content=content)
-        self.critics_consensus = standalone.critics_consensus(self.movie_title, content=content)
-        self.num_of_reviews = standalone.num_of_reviews(self.movie_title, content=content)
+        for field, extract in EXTRACTORS.items():
+            setattr(self, field, extract(content))
+
+        # When each field was last extracted, see `stale_fields`
+        now = time.time()
+        self._fetched_at: Dict[str, float] = {field: now for field in self.to_dict()}
+
+        index.record_movie(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], fetched_at: Optional[Dict[str, float]] = None) -> "Movie":
+        """
+        Rebuild a movie from `to_dict` output without fetching anything. `fetched_at`
+        maps fields to when they were extracted, defaulting to now.
+        """
+        movie = cls.__new__(cls)
+        movie.__dict__.update(data)
+
+        now = time.time()
+        movie._fetched_at = {field: now for field in data}
+        movie._fetched_at.update(fetched_at or {})
+        return movie
+
+    def stale_fields(self, ttls: Optional[Dict[str, float]] = None) -> List[str]:
+        """Fields older than their TTL in `ttls` (default `FIELD_TTLS`)."""
+        ttls = FIELD_TTLS if ttls is None else ttls
+        now = time.time()
+
+        return [
+            field for field, ttl in ttls.items()
+            if now - self._fetched_at.get(field, 0) >= ttl
+        ]
+
+    def refresh(self, fields: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Re-fetch the movie's page and update only the given volatile fields (default,
+        the stale ones), leaving the rest untouched. Refreshing any of the scores
+        refreshes all of `SCORE_FIELDS`. Returns the fields refreshed.
+        """
+        fields = self.stale_fields() if fields is None else list(fields)
+        if not fields:
+            return []
+
+        unsupported = set(fields) - set(VOLATILE_FIELDS)
+        if unsupported:
+            raise ValueError(f"Only volatile fields can be refreshed, not {sorted(unsupported)}.")
+
+        # The weighted score is derived from the other two scores, so all three go together
+        if set(SCORE_FIELDS) & set(fields):
+            fields += [field for field in SCORE_FIELDS if field not in fields]
+
+        content = standalone._request(movie_name="", force_url=self.url)
+        values = _score_fields(content)
+
+        now = time.time()
+        for field in fields:
+            setattr(self, field, values[field])
+            self._fetched_at[field] = now
+
+        return fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        """All attributes as a dictionary, ex. to serialize as JSON."""
+        return {key: value for key, value in vars(self).items() if not key.startswith("_")}
 
     def __str__(self) -> str:
         return f"{self.movie_title.title()}, {self.rating}, {self.duration}.\n" \
@@ -44,3 +142,11 @@ class Movie:
 
     def __eq__(self, other: "Movie") -> bool:
         return self.movie_title == other.movie_title
+
+
+def fetch_movie(query: str) -> Movie:
+    """Treat `query` as a url if it looks like one, otherwise search for it."""
+    if query.startswith(("http://", "https://")):
+        return Movie(force_url=query)
+
+    return Movie(query)
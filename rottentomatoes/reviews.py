@@ -0,0 +1,132 @@
+"""Critic reviews of a movie, streamed from its paginated reviews pages."""
+from bs4 import BeautifulSoup
+
+import math
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterator, List, NamedTuple, Optional, Union
+
+from . import standalone
+from .exceptions import LookupError
+from .movie import Movie
+
+
+# Reviews listed on each page of a movie's reviews
+REVIEWS_PER_PAGE = 20
+
+# Pages fetched at most, in case the site stops paginating as expected
+MAX_PAGES = 1000
+
+# Score icon sentiments, newer pages use the former and older pages the latter
+SENTIMENTS = {"positive": "fresh", "negative": "rotten", "fresh": "fresh", "rotten": "rotten"}
+
+
+class Review(NamedTuple):
+    """A single critic review."""
+    critic: Optional[str]
+    publication: Optional[str]
+    quote: Optional[str]
+    sentiment: Optional[str]  # "fresh" or "rotten"
+    original_score: Optional[str]  # ex. 3/4, as given by the critic
+    date: Optional[str]
+    url: Optional[str]
+
+
+def _text(element) -> Optional[str]:
+    return element.text.strip() if element is not None else None
+
+
+def _parse_review(row) -> Review:
+    """Build a review from one `review-row` element of a reviews page."""
+    link = row.find("a", {"data-qa": "full-review-link"})
+
+    sentiment = None
+    score_icon = row.find(["score-icon-critic-deprecated", "score-icon-critic"])
+    if score_icon is not None:
+        sentiment = SENTIMENTS.get((score_icon.get("sentiment") or score_icon.get("state") or "").lower())
+
+    original_score = None
+    score_line = row.find("p", {"class": "original-score-and-url"})
+    if score_line is not None and "Original Score:" in score_line.text:
+        original_score = score_line.text.split("Original Score:")[1].split("|")[0].strip()
+
+    return Review(
+        critic=_text(row.find("a", {"data-qa": "review-critic-link"})),
+        publication=_text(row.find("a", {"data-qa": "review-publication"})),
+        quote=_text(row.find("p", {"data-qa": "review-quote"})),
+        sentiment=sentiment,
+        original_score=original_score or None,
+        date=_text(row.find("span", {"data-qa": "review-date"})),
+        url=link.get("href") if link is not None else None,
+    )
+
+
+def parse_reviews(content: str) -> List[Review]:
+    """Every review on a page of a movie's reviews."""
+    soup = BeautifulSoup(content, "html.parser")
+    return [_parse_review(row) for row in soup.find_all("div", {"data-qa": "review-item"})]
+
+
+def reviews_page_url(movie_url: str, page: int) -> str:
+    """Url of a page of a movie's critic reviews. Pages start at 1."""
+    return f"{movie_url.rstrip('/')}/reviews?type=&page={page}"
+
+
+def _fetch_page(movie_url: str, page: int) -> List[Review]:
+    """Reviews on a page, empty if the page is past the last one."""
+    try:
+        content = standalone._request(movie_name="", force_url=reviews_page_url(movie_url, page))
+    except LookupError:
+        if page == 1:
+            raise
+        return []
+
+    return parse_reviews(content)
+
+
+def iter_reviews(movie: Union[Movie, str], concurrency: int = 4, prefetch: int = 8) -> Iterator[Review]:
+    """
+    Yield a movie's critic reviews, in the order listed on Rotten Tomatoes. `movie`
+    is a `Movie` or its url.
+
+    Pages are fetched `concurrency` at a time, at most `prefetch` pages ahead of
+    the page being consumed, so memory stays bounded however many reviews there
+    are. Stopping iteration early cancels pages not yet fetched. Iteration also
+    stops at a page repeating the previous one (ex. if the site ignores the page
+    number), or after `MAX_PAGES` pages.
+    """
+    if isinstance(movie, Movie):
+        movie_url = movie.url
+        num_reviews = movie.num_of_reviews
+    else:
+        movie_url, num_reviews = movie, None
+
+    # Without a review count, keep going until a page comes back empty or repeats
+    last_page = min(math.ceil(num_reviews / REVIEWS_PER_PAGE), MAX_PAGES) if num_reviews else MAX_PAGES
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    pending: Deque[Future] = deque()
+    next_page = 1
+
+    def schedule() -> None:
+        nonlocal next_page
+        while len(pending) < max(prefetch, 1) and next_page <= last_page:
+            pending.append(pool.submit(_fetch_page, movie_url, next_page))
+            next_page += 1
+
+    previous: List[Review] = []
+
+    try:
+        schedule()
+        while pending:
+            reviews = pending.popleft().result()
+            if not reviews or reviews == previous:
+                break
+            previous = reviews
+
+            schedule()
+            yield from reviews
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
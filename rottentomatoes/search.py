@@ -1,19 +1,54 @@
 """Search for movies. Use search page results to find absolute link. Write more/better docs later."""
 import requests
 
+import html
 import re
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
 
+from . import cache
+from . import index
+from . import snapshots
 from . import utils
-from .exceptions import LookupError
+from .exceptions import LookupError, TransientError
+
+if TYPE_CHECKING:
+    from .movie import Movie
+
+
+def _snippet_text(text: str) -> str:
+    """
+    Clean text from the search page. The page is kept as the `str` of its bytes,
+    so non-ASCII characters and newlines show up as escape sequences.
+    """
+    try:
+        text = text.encode("latin-1").decode("unicode_escape").encode("latin-1").decode("utf-8")
+    except (UnicodeError, ValueError):
+        pass
+
+    return " ".join(html.unescape(text).split())
 
 
 class SearchListing:
-    """A search listing from the Rotten Tomatoes search page."""
-    def __init__(self, has_tomatometer: bool, is_movie: bool, url: str) -> None:
+    """
+    A search listing from the Rotten Tomatoes search page. The title, year, and
+    tomatometer come from the search page itself, use `hydrate` for everything else.
+    """
+    def __init__(
+        self,
+        has_tomatometer: bool,
+        is_movie: bool,
+        url: str,
+        title: str = "",
+        year: Optional[str] = None,
+        tomatometer: Optional[int] = None
+    ) -> None:
         self.has_tomatometer = has_tomatometer
         self.is_movie = is_movie
         self.url = str(url)
+        self.title = title
+        self.year = year
+        self.tomatometer = tomatometer
         
     @classmethod
     def from_html(cls, html_snippet: str) -> "SearchListing":
@@ -37,22 +72,54 @@ class SearchListing:
         
         # Determine if it's a movie
         is_movie = "/m/" in url
+
+        # Title, year, and score as shown on the search page
+        titles = re.findall(r'slot="title"[^>]*>(.*?)</a>', html_snippet)
+        title = _snippet_text(titles[0]) if titles else ""
+        years = re.findall(r'releaseyear="(\d+)"', html_snippet)
+        year = years[0] if years else None
+        tomatometer = int(meter) if meter.isdigit() else None
         
-        return cls(has_tomatometer=has_tomatometer, is_movie=is_movie, url=url)
+        return cls(
+            has_tomatometer=has_tomatometer,
+            is_movie=is_movie,
+            url=url,
+            title=title,
+            year=year,
+            tomatometer=tomatometer
+        )
+
+    def hydrate(self) -> "Movie":
+        """Fetch the listing's full movie page."""
+        from .movie import Movie
+
+        return Movie(force_url=self.url)
     
     def __str__(self) -> str:
         """Represent the SearchListing object."""
-        return f"Tomatometer: {self.has_tomatometer}. URL: {self.url}. Is movie: {self.is_movie}."
+        return f"{self.title} ({self.year}). Tomatometer: {self.tomatometer}. " \
+            f"URL: {self.url}. Is movie: {self.is_movie}."
 
 
 def _movie_search_content(name: str) -> str:
     """Raw HTML content from searching for a movie."""
     url_name = "%20".join(name.split())
     url = f"https://www.rottentomatoes.com/search?search={url_name}"
-    content = str(requests.get(url, headers=utils.REQUEST_HEADERS).content)
+    response = requests.get(url, headers=utils.REQUEST_HEADERS)
+
+    if utils.is_transient(response.status_code):
+        raise TransientError(
+            f"Rotten Tomatoes search returned {response.status_code}, try again later."
+        )
+    if response.status_code != 200:
+        # Ex. a 403 bot block, which says nothing about whether the movie exists
+        raise LookupError(f"Rotten Tomatoes search returned {response.status_code}.")
+
+    content = str(response.content)
     
     # Remove misc quotes from conversion
     content = content[2:-1]
+    snapshots.record(url, content, "search")
     return content
 
 
@@ -60,7 +127,9 @@ def search_results(name: str) -> List[SearchListing]:
     """Get a list of search results."""
     content = _movie_search_content(name)
     snippets = re.findall(r"<search-page-media-row(.*?)</search-page-media-row>", content)
-    return [SearchListing.from_html(snippet) for snippet in snippets]
+    results = [SearchListing.from_html(snippet) for snippet in snippets]
+    index.record_listings(results)
+    return results
 
 
 def filter_searches(results: List[SearchListing]) -> List[SearchListing]:
@@ -69,11 +138,30 @@ def filter_searches(results: List[SearchListing]) -> List[SearchListing]:
 
 
 def top_movie_result(name: str) -> SearchListing:
-    """Get the first movie result that has a tomatometer."""
+    """
+    Get the first movie result that has a tomatometer. Queries with no results on
+    a successful search are remembered in `cache.negative_cache` and fail fast
+    until they expire.
+    """
+    key = cache.search_key(name)
+    if key in cache.negative_cache:
+        raise LookupError("No movies found.")
+
     results = search_results(name)
     filtered = filter_searches(results)
     
     if not filtered:
+        cache.negative_cache.add(key, "No movies found.")
         raise LookupError("No movies found.")
-        
+
+    index.record_query(name, filtered[0].url)
     return filtered[0]
+
+
+def hydrate_all(listings: List[SearchListing], concurrency: int = 4) -> List["Movie"]:
+    """
+    Fetch the full movie of every listing, `concurrency` at a time. Movies are
+    returned in the same order as `listings`.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(SearchListing.hydrate, listings))
@@ -0,0 +1,291 @@
+"""
+Opt-in store of the raw pages fetched from Rotten Tomatoes, so fields can be
+re-extracted later (ex. after a selector fix) without fetching anything again.
+
+Pages are content addressed, so identical pages are stored once. They're
+compressed with a dictionary shared by pages of the same kind, which captures the
+markup every page repeats. Call `enable` to start recording pages.
+"""
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional, zlib is used without it
+    zstandard = None
+
+from .movie import EXTRACTORS  # Movie's extraction, so re-extraction matches live fetches
+
+
+# Bytes of a sample page used as the shared dictionary. zlib can't use more.
+DICTIONARY_SIZE = 32 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    dictionary_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs (digest)
+);
+CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, fetched_at);
+CREATE INDEX IF NOT EXISTS snapshots_kind ON snapshots (kind);
+"""
+
+
+class Snapshot(NamedTuple):
+    """Where a stored page lives in the pack file, and how to decompress it."""
+    url: str
+    kind: str
+    fetched_at: float
+    digest: str
+    offset: int
+    length: int
+    codec: str
+    dictionary_id: Optional[int]
+
+
+def _compress(data: bytes, codec: str, dictionary: Optional[bytes]) -> bytes:
+    if codec == "zstd":
+        zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=10, dict_data=zdict).compress(data)
+
+    compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes, codec: str, dictionary: Optional[bytes]) -> bytes:
+    if codec == "zstd":
+        zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=zdict).decompress(data)
+
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+class SnapshotStore:
+    """
+    Pages in an append-only pack file in `directory`, indexed by url and fetch time
+    in SQLite. Reads go through a memory map of the pack file. Several processes
+    can write to the same store.
+    """
+    def __init__(self, directory: str, codec: Optional[str] = None) -> None:
+        """`codec` is zstd (needs `zstandard`) or zlib, defaulting to zstd when it's installed."""
+        codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires zstandard, install it with `pip install zstandard`.")
+        if codec not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown codec {codec}, use zstd or zlib.")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.codec = codec
+        self.pack_path = os.path.join(directory, "pages.pack")
+        self.index_path = os.path.join(directory, "index.sqlite3")
+
+        self._dictionaries: Dict[int, bytes] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._map_lock = threading.Lock()
+
+        open(self.pack_path, "ab").close()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Autocommit connection, closed (rolling back any open transaction) on exit."""
+        conn = sqlite3.connect(self.index_path, timeout=60, isolation_level=None)
+
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _dictionary(self, conn: sqlite3.Connection, kind: str, sample: bytes) -> Tuple[int, bytes]:
+        """The kind's shared dictionary, made from `sample` if it's the first page of its kind."""
+        row = conn.execute("SELECT id, data FROM dictionaries WHERE kind = ?", (kind,)).fetchone()
+        if row is None:
+            data = sample[:DICTIONARY_SIZE]
+            row = (conn.execute("INSERT INTO dictionaries (kind, data) VALUES (?, ?)", (kind, data)).lastrowid, data)
+
+        self._dictionaries[row[0]] = row[1]
+        return row
+
+    def save(self, url: str, content: str, kind: str = "movie", fetched_at: Optional[float] = None) -> str:
+        """Store a fetched page, returning its digest. A page already stored isn't written again."""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+
+        with self._connect() as conn:
+            # The write lock also serializes appends to the pack file between processes
+            conn.execute("BEGIN IMMEDIATE")
+
+            if conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is None:
+                dictionary_id, dictionary = self._dictionary(conn, kind, data)
+                blob = _compress(data, self.codec, dictionary)
+
+                with open(self.pack_path, "ab") as pack:
+                    offset = pack.seek(0, os.SEEK_END)
+                    pack.write(blob)
+                    pack.flush()
+                    os.fsync(pack.fileno())
+
+                conn.execute(
+                    "INSERT INTO blobs VALUES (?, ?, ?, ?, ?)", (digest, offset, len(blob), self.codec, dictionary_id)
+                )
+
+            conn.execute("INSERT INTO snapshots VALUES (?, ?, ?, ?)", (url, kind, fetched_at, digest))
+            conn.execute("COMMIT")
+
+        return digest
+
+    def _read(self, offset: int, length: int) -> bytes:
+        with self._map_lock:
+            if self._map is None or offset + length > len(self._map):
+                if self._map is not None:
+                    self._map.close()
+                with open(self.pack_path, "rb") as pack:
+                    self._map = mmap.mmap(pack.fileno(), 0, access=mmap.ACCESS_READ)
+
+            return self._map[offset:offset + length]
+
+    def load(self, snapshot: Snapshot) -> str:
+        """The page content of a snapshot."""
+        dictionary = None
+        if snapshot.dictionary_id is not None:
+            if snapshot.dictionary_id not in self._dictionaries:
+                with self._connect() as conn:
+                    self._dictionaries[snapshot.dictionary_id] = conn.execute(
+                        "SELECT data FROM dictionaries WHERE id = ?", (snapshot.dictionary_id,)
+                    ).fetchone()[0]
+            dictionary = self._dictionaries[snapshot.dictionary_id]
+
+        data = _decompress(self._read(snapshot.offset, snapshot.length), snapshot.codec, dictionary)
+        return data.decode("utf-8")
+
+    def snapshots(self, url: Optional[str] = None, kind: Optional[str] = None,
+                  latest_only: bool = True) -> List[Snapshot]:
+        """Stored snapshots, optionally of one url or kind, by default only the latest of each url."""
+        query = (
+            "SELECT s.url, s.kind, s.fetched_at, s.digest, b.offset, b.length, b.codec, b.dictionary_id "
+            "FROM snapshots s JOIN blobs b ON b.digest = s.digest WHERE 1"
+        )
+        params: List[Any] = []
+
+        if url is not None:
+            query += " AND s.url = ?"
+            params.append(url)
+        if kind is not None:
+            query += " AND s.kind = ?"
+            params.append(kind)
+        if latest_only:
+            query += " AND s.fetched_at = (SELECT MAX(fetched_at) FROM snapshots WHERE url = s.url)"
+
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY s.url, s.fetched_at", params).fetchall()
+
+        return [Snapshot(*row) for row in rows]
+
+    def latest(self, url: str) -> Optional[str]:
+        """Content of the most recent snapshot of `url`, or None if it was never stored."""
+        snapshots = self.snapshots(url=url)
+        return self.load(snapshots[-1]) if snapshots else None
+
+    def close(self) -> None:
+        with self._map_lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+# Each reextract worker process opens the store once
+_worker_store: Optional[SnapshotStore] = None
+
+
+def _init_worker(directory: str, codec: str) -> None:
+    global _worker_store
+    _worker_store = SnapshotStore(directory, codec)
+
+
+def _extract_snapshot(snapshot: Snapshot, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    content = _worker_store.load(snapshot)
+    record: Dict[str, Any] = {"snapshot_url": snapshot.url, "fetched_at": snapshot.fetched_at, "errors": {}}
+
+    for field in fields:
+        try:
+            record[field] = EXTRACTORS[field](content)
+        except Exception as e:
+            record[field] = None
+            record["errors"][field] = f"{type(e).__name__}: {e}"
+
+    return record
+
+
+def reextract(store: SnapshotStore, fields: Optional[Iterable[str]] = None,
+              workers: Optional[int] = None, latest_only: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Run the current extraction code over every stored movie page with `workers`
+    processes (default, one per CPU), yielding one record per page with the
+    requested `fields` (default, every `Movie` attribute) in url order. Fields that
+    fail to extract are None, with the reason in the record's `errors`.
+    """
+    fields = tuple(EXTRACTORS) if fields is None else tuple(fields)
+    unknown = set(fields) - set(EXTRACTORS)
+    if unknown:
+        raise ValueError(f"Unknown fields {sorted(unknown)}, use any of {list(EXTRACTORS)}.")
+
+    snapshots = store.snapshots(kind="movie", latest_only=latest_only)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(store.directory, store.codec)) as pool:
+        yield from pool.map(
+            _extract_snapshot, snapshots, [fields] * len(snapshots),
+            chunksize=max(1, min(64, len(snapshots) // (4 * workers)))
+        )
+
+
+# The store pages are recorded in, None when disabled
+snapshot_store: Optional[SnapshotStore] = None
+
+
+def enable(directory: str, codec: Optional[str] = None) -> SnapshotStore:
+    """Record every page fetched from now on in the store at `directory`."""
+    global snapshot_store
+    disable()
+    snapshot_store = SnapshotStore(directory, codec)
+    return snapshot_store
+
+
+def disable() -> None:
+    """Stop recording pages."""
+    global snapshot_store
+    if snapshot_store is not None:
+        snapshot_store.close()
+        snapshot_store = None
+
+
+def record(url: str, content: str, kind: str) -> None:
+    """Store a fetched page, if recording is enabled."""
+    if snapshot_store is not None:
+        snapshot_store.save(url, content, kind)
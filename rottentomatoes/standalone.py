@@ -8,7 +8,10 @@ from typing import List, Dict, Union
 
 # Project modules
 from .exceptions import *
+from . import cache
+from . import index
 from . import search
+from . import snapshots
 from . import utils
 
 
@@ -127,7 +130,10 @@ def _request(movie_name: str, raw_url: bool = False, force_url: str = "") -> str
     Raises:
         LookupError: If the movie isn't found on Rotten Tomatoes.
         This could be due to a typo in entering the movie's name,
-        duplicates, or other issues.
+        duplicates, or other issues. Misses are remembered for a
+        short time in `cache.negative_cache`.
+        TransientError: If Rotten Tomatoes is rate limiting or
+        failing. These are never cached, so retrying is safe.
 
     Returns:
         str: The raw RT website data of the given movie.
@@ -135,17 +141,30 @@ def _request(movie_name: str, raw_url: bool = False, force_url: str = "") -> str
     if raw_url or force_url:
         rt_url = _movie_url(movie_name) if movie_name else force_url
     else:
-        search_result = search.top_movie_result(movie_name)
-        rt_url = search_result.url
+        rt_url = index.resolve(movie_name) or search.top_movie_result(movie_name).url
+
+    key = cache.url_key(rt_url)
+    if key in cache.negative_cache:
+        raise LookupError(
+            "Unable to find that movie on Rotten Tomatoes.",
+            f"Try this link to source the movie manually: {rt_url}"
+        )
 
     response = requests.get(rt_url, headers=utils.REQUEST_HEADERS)
 
     if response.status_code == 404:
+        cache.negative_cache.add(key, "404")
         raise LookupError(
             "Unable to find that movie on Rotten Tomatoes.",
             f"Try this link to source the movie manually: {rt_url}"
         )
 
+    if utils.is_transient(response.status_code):
+        raise TransientError(
+            f"Rotten Tomatoes returned {response.status_code} for {rt_url}, try again later."
+        )
+
+    snapshots.record(rt_url, response.text, "reviews" if "/reviews" in rt_url else "movie")
     return response.text
 
 
@@ -264,9 +283,11 @@ def weighted_score(movie_name: str, content: str = None) -> Union[int, None]:
     if content is None:
         content = _request(movie_name)
 
-    t_score = tomatometer(movie_name, content)
-    a_score = audience_score(movie_name, content)
+    return _weighted_score(tomatometer(movie_name, content), audience_score(movie_name, content))
+
 
+def _weighted_score(t_score: Union[int, None], a_score: Union[int, None]) -> Union[int, None]:
+    """Weighted score from an already parsed tomatometer and audience score."""
     if t_score is None and a_score is None:
         return None
 
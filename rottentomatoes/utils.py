@@ -12,3 +12,8 @@ REQUEST_HEADERS: Dict[str, str] = {
     "Accept": "text/html",
     "Referer": "https://www.google.com"
 }
+
+
+def is_transient(status_code: int) -> bool:
+    """Whether an HTTP status means the request may succeed if retried later."""
+    return status_code == 429 or status_code >= 500
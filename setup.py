@@ -24,6 +24,8 @@ setup(
     long_description_content_type="text/markdown",
     packages=find_packages(),
     install_requires=["requests", "beautifulsoup4"],
+    extras_require={"parquet": ["pyarrow"], "stats": ["numpy"], "zstd": ["zstandard"]},
+    entry_points={"console_scripts": ["rottentomatoes=rottentomatoes.cli:main"]},
     keywords=["python", "movies", "rottentomatoes"],
     url="https://github.com/preritdas/rottentomatoes-python",
     classifiers=[
@@ -0,0 +1,92 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import api
+from rottentomatoes import exceptions
+
+
+def fake_build_movie(movie_name="", force_url=""):
+    if movie_name == "missing":
+        raise exceptions.LookupError("No movies found.")
+    if movie_name == "slow":
+        time.sleep(0.3)
+
+    return {
+        "name": movie_name.title(), "synopsis": "", "tomatometer": 50, "num_of_reviews": 10,
+        "audience_score": 50, "weighted_score": 50, "genres": [], "rating": "PG", "duration": "1h",
+        "year": "2000", "actors": [], "directors": [],
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "build_movie", fake_build_movie)
+    return TestClient(api.app)  # without startup, so no job queue is opened
+
+
+def test_batch_streams_results_as_they_finish(client):
+    response = client.post("/movies", json=[{"name": "slow"}, {"name": "missing"}, {"name": "fast"}])
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines][-1] == 0  # the slow query finishes last
+    results = {line["index"]: line for line in lines}
+    assert results[0]["movie"]["name"] == "Slow"
+    assert results[1] == {
+        "index": 1, "query": {"name": "missing", "url": ""}, "movie": None, "error": "LookupError: No movies found."
+    }
+    assert results[2]["error"] is None
+
+
+def test_query_needs_name_or_url(client):
+    assert client.post("/movies", json=[{"name": "fast"}, {}]).status_code == 422
+    assert client.post("/jobs", json={"queries": [{"url": " "}]}).status_code == 422
+
+
+def test_jobs_disabled_when_database_unavailable(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(api, "JOBS_DATABASE", str(tmp_path / "missing" / "jobs.sqlite3"))
+    monkeypatch.setattr(api, "job_queue", None)
+
+    with client:
+        assert client.post("/jobs", json={"queries": [{"name": "fast"}]}).status_code == 503
+        assert client.get("/movie/fast").json()["name"] == "Fast"
+    assert api.job_queue is None
+
+
+def test_jobs(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(api, "JOBS_DATABASE", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(api, "job_queue", None)  # restored after the test
+
+    with client:
+        job = client.post("/jobs", json={"queries": [{"name": "fast"}, {"name": "missing"}]}).json()
+        for _ in range(50):
+            if client.get(f"/jobs/{job['id']}").json()["finished"]:
+                break
+            time.sleep(0.1)
+
+        page = client.get(f"/jobs/{job['id']}/results", params={"limit": 1}).json()
+        assert page["next_offset"] == 1
+        assert len(page["results"]) == 1
+        assert len(client.get(f"/jobs/{job['id']}/results/stream").text.splitlines()) == 2
+        assert client.get("/jobs/nope").status_code == 404
+
+
+def test_stats_failures_dont_fail_requests(monkeypatch):
+    class BrokenCorpus:
+        def add(self, movie):
+            raise ValueError("full")
+
+    monkeypatch.setattr(api, "stats_corpus", BrokenCorpus())
+    api.record_stats(api.rt.Movie.from_dict({"url": "https://www.rottentomatoes.com/m/a"}))
+
+    monkeypatch.setattr(api, "stats_corpus", None)
+    assert TestClient(api.app).get("/stats").status_code == 503
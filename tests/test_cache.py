@@ -0,0 +1,116 @@
+import pytest
+
+from rottentomatoes import cache
+from rottentomatoes import exceptions
+from rottentomatoes import search
+from rottentomatoes import standalone
+from rottentomatoes.movie import Movie
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = "") -> None:
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+
+
+@pytest.fixture
+def fake_get(monkeypatch):
+    """Replace `requests.get` with a canned response, recording each url fetched."""
+    calls = []
+
+    def install(status_code: int, text: str = ""):
+        def get(url, headers=None):
+            calls.append(url)
+            return FakeResponse(status_code, text)
+
+        monkeypatch.setattr(search.requests, "get", get)
+        monkeypatch.setattr(standalone.requests, "get", get)
+        return calls
+
+    cache.negative_cache.clear()
+    yield install
+    cache.negative_cache.clear()
+
+
+def test_negative_cache_expiry(monkeypatch):
+    negative = cache.NegativeCache(ttl=10)
+    negative.add("key", "reason")
+    assert negative.get("key") == "reason"
+
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 11)
+    assert "key" not in negative
+
+
+def test_negative_cache_is_bounded(monkeypatch):
+    negative = cache.NegativeCache(ttl=10, max_entries=3)
+    for key in "abcd":
+        negative.add(key)
+    assert len(negative) == 3
+    assert "a" not in negative and "d" in negative
+
+    # Expired entries are dropped without being looked up
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 11)
+    negative.add("e")
+    assert len(negative) == 1
+
+
+def test_search_miss_is_cached(fake_get):
+    calls = fake_get(200, "<html>no results</html>")
+
+    for _ in range(3):
+        with pytest.raises(exceptions.LookupError):
+            search.top_movie_result("not  A real Movie")
+
+    assert len(calls) == 1
+    assert cache.search_key("not a real movie") in cache.negative_cache
+
+
+def test_failed_search_not_cached(fake_get):
+    calls = fake_get(403, "<html>blocked</html>")
+
+    for _ in range(2):
+        with pytest.raises(exceptions.LookupError, match="403"):
+            search.top_movie_result("top gun")
+
+    assert len(calls) == 2
+    assert len(cache.negative_cache) == 0
+
+
+def test_404_is_cached(fake_get):
+    calls = fake_get(404)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.LookupError):
+            standalone._request("", force_url="https://www.rottentomatoes.com/m/missing")
+
+    assert len(calls) == 1
+
+
+def test_transient_failures_not_cached(fake_get):
+    calls = fake_get(503)
+
+    for _ in range(2):
+        with pytest.raises(exceptions.TransientError):
+            search.top_movie_result("top gun")
+        with pytest.raises(exceptions.TransientError):
+            standalone._request("", force_url="https://www.rottentomatoes.com/m/top_gun")
+
+    assert len(calls) == 4
+    assert len(cache.negative_cache) == 0
+
+
+def test_movie_cache_round_trip(tmp_path):
+    data = {"movie_title": "Happy Gilmore", "tomatometer": 61, "url": "https://www.rottentomatoes.com/m/happy_gilmore"}
+    movies = cache.MovieCache(ttls={"tomatometer": 60})
+    movies.put(Movie.from_dict(data, {"tomatometer": 0}))
+    movies.put(Movie.from_dict({**data, "url": "https://www.rottentomatoes.com/m/other"}))
+
+    movies.save(str(tmp_path / "movies.json"))
+    loaded = cache.MovieCache.load(str(tmp_path / "movies.json"), ttls={"tomatometer": 60})
+
+    assert len(loaded) == 2
+    assert loaded.get("https://www.rottentomatoes.com/m/happy_gilmore/").to_dict() == data
+    assert [m.url for m in loaded.stale()] == ["https://www.rottentomatoes.com/m/happy_gilmore"]
@@ -0,0 +1,115 @@
+import io
+import json
+
+import pytest
+
+from rottentomatoes import cli
+from rottentomatoes import exceptions
+
+
+class FakeMovie:
+    def __init__(self, query: str) -> None:
+        self.query = query
+
+    def to_dict(self):
+        return {"movie_title": self.query.title(), "tomatometer": 50}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Replace fetching with a fake, recording every query fetched."""
+    calls = []
+
+    def fetch_movie(query):
+        calls.append(query)
+        if query == "missing":
+            raise exceptions.LookupError("No movies found.")
+        if query == "flaky":
+            raise exceptions.TransientError("503")
+        return FakeMovie(query)
+
+    monkeypatch.setattr(cli, "fetch_movie", fetch_movie)
+    return calls
+
+
+def test_read_queries():
+    assert list(cli.read_queries(["top gun\n", "\n", "# comment\n", " https://x \n"])) == ["top gun", "https://x"]
+
+
+def test_export_resumes_from_checkpoint(tmp_path, fetched):
+    checkpoint = cli.Checkpoint(str(tmp_path / "out.checkpoint"))
+    output = io.StringIO()
+    counts = cli.export(["a", "missing", "flaky", "a"], cli.JSONLWriter(output), checkpoint, log=io.StringIO())
+    checkpoint.close()
+
+    assert counts == {"exported": 1, "missing": 1, "failed": 1, "skipped": 1}
+    assert [json.loads(line)["query"] for line in output.getvalue().splitlines()] == ["a"]
+
+    # Only the transient failure and new queries are fetched again
+    fetched.clear()
+    checkpoint = cli.Checkpoint(str(tmp_path / "out.checkpoint"))
+    cli.export(["a", "missing", "flaky", "b"], cli.JSONLWriter(io.StringIO()), checkpoint, log=io.StringIO())
+    checkpoint.close()
+
+    assert sorted(fetched) == ["b", "flaky"]
+
+
+def test_export_command(tmp_path, fetched):
+    infile = tmp_path / "titles.txt"
+    infile.write_text("a\nb\n")
+    outfile = tmp_path / "out.jsonl"
+
+    assert cli.main(["export", str(infile), "-o", str(outfile), "-c", "2"]) == 0
+    assert cli.main(["export", str(infile), "-o", str(outfile)]) == 0
+
+    assert sorted(json.loads(line)["query"] for line in outfile.read_text().splitlines()) == ["a", "b"]
+    assert sorted(fetched) == ["a", "b"]
+
+
+def test_parquet_export(tmp_path, fetched):
+    pq = pytest.importorskip("pyarrow.parquet")
+    directory = tmp_path / "snapshot"
+
+    for queries in (["a", "b"], ["b", "c"]):
+        checkpoint = cli.Checkpoint(str(tmp_path / "snapshot.checkpoint"))
+        writer = cli.ParquetWriter(str(directory), rows_per_file=1)
+        cli.export(queries, writer, checkpoint, log=io.StringIO())
+        checkpoint.close()
+
+    table = pq.read_table(str(directory))
+    assert sorted(table.column("query").to_pylist()) == ["a", "b", "c"]
+
+
+def test_parquet_export_interrupted(tmp_path, fetched, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    directory = str(tmp_path / "snapshot")
+    checkpoint_path = str(tmp_path / "snapshot.checkpoint")
+
+    # Part files are readable as soon as their queries are checkpointed, before close
+    writer = cli.ParquetWriter(directory, rows_per_file=2)
+    assert writer.write("a", {"query": "a"}) == []
+    assert writer.write("b", {"query": "b"}) == ["a", "b"]
+    assert pq.read_table(directory).column("query").to_pylist() == ["a", "b"]
+
+    fetch_movie = cli.fetch_movie
+
+    def interrupted(query):
+        if query == "d":
+            raise KeyboardInterrupt
+        return fetch_movie(query)
+
+    monkeypatch.setattr(cli, "fetch_movie", interrupted)
+    checkpoint = cli.Checkpoint(checkpoint_path)
+    with pytest.raises(KeyboardInterrupt):
+        cli.export(["c", "d", "e"], cli.ParquetWriter(directory), checkpoint, concurrency=1, log=io.StringIO())
+    checkpoint.close()
+
+    # Resuming fetches only what wasn't written, and every movie is written once
+    monkeypatch.setattr(cli, "fetch_movie", fetch_movie)
+    fetched.clear()
+    checkpoint = cli.Checkpoint(checkpoint_path)
+    cli.export(["c", "d", "e"], cli.ParquetWriter(directory), checkpoint, log=io.StringIO())
+    checkpoint.close()
+
+    assert "d" in fetched
+    assert sorted(pq.read_table(directory).column("query").to_pylist()) == ["a", "b", "c", "d", "e"]
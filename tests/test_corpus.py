@@ -0,0 +1,72 @@
+import math
+
+import pytest
+
+from rottentomatoes import standalone
+from rottentomatoes.movie import Movie
+
+np = pytest.importorskip("numpy")
+from rottentomatoes import corpus  # noqa: E402
+
+
+MOVIES = [
+    # url, genres, year, rating, tomatometer, audience score
+    ("a", ["Action"], "1995", "R", 40, 80),
+    ("b", ["Action", "Comedy"], "2001", "PG-13", 90, None),
+    ("c", ["Drama"], "2001", "R", None, None),
+    ("d", ["Comedy"], "2001", "R", 61, 85),
+]
+
+
+@pytest.fixture
+def movies_corpus():
+    return corpus.Corpus.from_movies(
+        Movie.from_dict({
+            "url": url, "genres": genres, "year_released": year, "rating": rating,
+            "tomatometer": t_score, "audience_score": a_score, "num_of_reviews": 10,
+        })
+        for url, genres, year, rating, t_score, a_score in MOVIES
+    )
+
+
+def test_weighted_scores_match_standalone():
+    scores = [None, 0, 1, 33, 61, 96, 99, 100]
+    pairs = [(t, a) for t in scores for a in scores]
+    as_array = lambda values: np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    bulk = corpus.weighted_scores(as_array(t for t, _ in pairs), as_array(a for _, a in pairs))
+
+    for (t_score, a_score), weighted in zip(pairs, bulk):
+        expected = standalone._weighted_score(t_score, a_score)
+        assert (math.isnan(weighted) if expected is None else weighted == expected)
+
+
+def test_aggregate(movies_corpus):
+    assert movies_corpus.aggregate("tomatometer", "count") == 3
+    assert movies_corpus.aggregate("tomatometer", "mean", by="genre") == {"Action": 65, "Comedy": 75.5}
+    assert movies_corpus.aggregate("weighted_score", "max", by=("rating", "year")) == {
+        ("R", 1995): 53, ("PG-13", 2001): 90, ("R", 2001): 69,
+    }
+    assert movies_corpus.aggregate("gap", "median", where={"year": (2000, None), "rating": "R"}) == 24
+    assert math.isnan(movies_corpus.aggregate("tomatometer", "mean", where={"genre": "Horror"}))
+
+
+def test_update_replaces_row(movies_corpus):
+    movies_corpus.add(Movie.from_dict({
+        "url": "a", "genres": ["Horror"], "year_released": "1995", "rating": "R",
+        "tomatometer": 10, "audience_score": 20, "num_of_reviews": 10,
+    }))
+
+    assert len(movies_corpus) == 4
+    assert movies_corpus.aggregate("tomatometer", "min", by="genre") == {"Action": 90, "Comedy": 61, "Horror": 10}
+
+
+def test_genres_past_the_limit_are_dropped(movies_corpus):
+    for i in range(corpus.MAX_GENRES + 2):
+        movies_corpus.add(Movie.from_dict({
+            "url": f"g{i}", "genres": [f"Genre {i}", "Action"], "year_released": "2000", "rating": "R",
+            "tomatometer": 50, "audience_score": 50, "num_of_reviews": 10,
+        }))
+
+    assert len(movies_corpus.genres) == corpus.MAX_GENRES
+    assert movies_corpus.aggregate("tomatometer", "count", by="genre")["Action"] == 2 + corpus.MAX_GENRES + 2
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from rottentomatoes import cli
+from rottentomatoes import crawl
+from rottentomatoes import exceptions
+
+
+class FakeMovie:
+    def __init__(self, query: str) -> None:
+        self.query = query
+
+    def to_dict(self):
+        return {"movie_title": self.query.title()}
+
+
+def test_hash_ring_is_consistent():
+    keys = [f"movie {i}" for i in range(2000)]
+    before = crawl.HashRing(range(4))
+    after = crawl.HashRing(range(5))
+
+    assert {before.node_for(key) for key in keys} == {0, 1, 2, 3}
+    moved = sum(before.node_for(key) != after.node_for(key) for key in keys)
+    assert moved < len(keys) * 0.35  # ideally a fifth
+
+
+def test_leases(tmp_path):
+    store = crawl.LeaseStore(str(tmp_path / "crawl.sqlite3"))
+    store.enqueue([("a", 0), ("b", 1), ("c", 1)])
+    store.enqueue([("a", 0)])
+
+    assert store.lease("w1", shard=1, limit=1) == ["b"]
+    assert store.lease("w2", shard=0, limit=5) == ["a", "c"]
+
+    store.complete("a", "w1", {"movie_title": "A"})  # not w1's lease
+    store.complete("a", "w2", {"movie_title": "A"})
+    store.fail("c", "w2", "TransientError: 503")
+    assert store.counts() == {"pending": 1, "leased": 1, "done": 1, "failed": 0}
+
+    # Expired leases are taken over
+    assert store.lease("w3", limit=5, lease_seconds=-1) == ["c"]
+    assert store.lease("w4", limit=5, lease_seconds=-1) == ["c"]
+
+    # An item whose lease keeps expiring, ex. because it kills its worker, fails
+    assert store.lease("w5", limit=5) == []
+    assert store.counts() == {"pending": 0, "leased": 1, "done": 1, "failed": 1}
+
+
+def test_budget(tmp_path):
+    store = crawl.LeaseStore(str(tmp_path / "crawl.sqlite3"))
+    store.set_budget(rate=50, burst=1)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        store.acquire()
+    assert time.perf_counter() - start >= 0.09
+
+    # More than the burst can never be spent
+    with pytest.raises(ValueError):
+        store.acquire(2)
+    with pytest.raises(ValueError):
+        store.set_budget(rate=0)
+
+
+def test_work(tmp_path, monkeypatch):
+    def fetch_movie(query):
+        if query == "missing":
+            raise exceptions.LookupError("No movies found.")
+        if query == "flaky":
+            raise exceptions.TransientError("503")
+        return FakeMovie(query)
+
+    monkeypatch.setattr(crawl, "fetch_movie", fetch_movie)
+    path = str(tmp_path / "crawl.sqlite3")
+    store = crawl.LeaseStore(path)
+    store.enqueue([("a", 0), ("missing", 1), ("flaky", 0), ("https://x/m/b", 1)])
+
+    assert crawl.work(store, "w1", shard=0) == 3 + crawl.MAX_ATTEMPTS
+    assert store.counts() == {"pending": 0, "leased": 0, "done": 2, "failed": 2}
+
+    results = {result["query"]: result for result in store.results()}
+    assert results["a"]["movie"] == {"movie_title": "A"}
+    assert results["missing"]["error"] == "LookupError: No movies found."
+    assert results["flaky"]["error"] == "TransientError: 503"
+
+
+def test_joined_worker_leaves_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl, "fetch_movie", FakeMovie)
+    output = tmp_path / "movies.jsonl"
+    output.write_text("written by the coordinator\n")
+    crawl.LeaseStore(str(output) + ".crawl.sqlite3").enqueue([("a", 0)])
+
+    assert cli.main(["crawl", "-o", str(output), "--join", "w2"]) == 0
+    assert output.read_text() == "written by the coordinator\n"
+    assert crawl.LeaseStore(str(output) + ".crawl.sqlite3").counts()["done"] == 1
@@ -0,0 +1,89 @@
+import pytest
+
+from rottentomatoes import index
+from rottentomatoes import search
+from rottentomatoes import standalone
+
+
+@pytest.fixture
+def title_index():
+    titles = index.TitleIndex(":memory:")
+    titles.add("https://www.rottentomatoes.com/m/happy_gilmore", "Happy Gilmore", "1996")
+    titles.add("https://www.rottentomatoes.com/m/bad_boys", "Bad Boys", "1995")
+    titles.add("https://www.rottentomatoes.com/m/1001531-bad_boys", "Bad Boys", "1983")
+    titles.add("https://www.rottentomatoes.com/m/amelie", "Amélie", "2001")
+    yield titles
+    titles.close()
+
+
+def test_normalize():
+    assert index.normalize("  Amélie & Co: The Movie!") == "amelie and co the movie"
+    assert index.split_year("top gun (1986)") == ("top gun", "1986")
+    assert index.split_year("2012") == ("2012", None)
+
+
+def test_lookup(title_index):
+    assert title_index.lookup("HAPPY gilmore") == "https://www.rottentomatoes.com/m/happy_gilmore"
+    assert title_index.lookup("amelie") == "https://www.rottentomatoes.com/m/amelie"
+    assert title_index.lookup("hapy gilmore") == "https://www.rottentomatoes.com/m/happy_gilmore"
+    assert title_index.lookup("the godfather") is None
+
+    # Same title, different years
+    assert title_index.lookup("bad boys") is None
+    assert title_index.lookup("bad boys 1983") == "https://www.rottentomatoes.com/m/1001531-bad_boys"
+    assert title_index.lookup("bad boys", year="1995") == "https://www.rottentomatoes.com/m/bad_boys"
+
+    # A query for the original isn't resolved to a sequel, only typos are forgiven
+    title_index.add("https://www.rottentomatoes.com/m/bad_boys_ii", "Bad Boys II", "2003")
+    title_index.add("https://www.rottentomatoes.com/m/happy_gilmore_2", "Happy Gilmore 2", "2025")
+    title_index.add("https://www.rottentomatoes.com/m/the_godfather_part_ii", "The Godfather Part II", "1974")
+    assert title_index.lookup("bad boys 2003") is None
+    assert title_index.lookup("the godfather") is None
+    assert title_index.lookup("the godfather part ii") == "https://www.rottentomatoes.com/m/the_godfather_part_ii"
+    assert title_index.lookup("the godfathr part ii") == "https://www.rottentomatoes.com/m/the_godfather_part_ii"
+    assert title_index.lookup("happy gilmore") == "https://www.rottentomatoes.com/m/happy_gilmore"
+    assert title_index.lookup("hapy gilmore") == "https://www.rottentomatoes.com/m/happy_gilmore"
+
+    sequels = index.TitleIndex(":memory:")
+    sequels.add("https://www.rottentomatoes.com/m/happy_gilmore_2", "Happy Gilmore 2", "2025")
+    sequels.add("https://www.rottentomatoes.com/m/bad_boys_ii", "Bad Boys II", "2003")
+    assert sequels.lookup("happy gilmore") is None
+    assert sequels.lookup("bad boys") is None
+    sequels.close()
+
+    # Nor to another film of the series, when only that one is indexed
+    for title, sequel, typo in [
+        ("Toy Story 3", "toy story 2", "toy storyy 3"), ("Rocky IV", "rocky ii", "rockyy iv"),
+        ("Saw III", "saw ii", "saww iii"), ("Shrek 2", "shrek 3", "shrekk 2"), ("Aliens", "alien", "alliens"),
+    ]:
+        series = index.TitleIndex(":memory:")
+        series.add("https://www.rottentomatoes.com/m/series", title)
+        assert series.lookup(sequel) is None, sequel
+        assert series.lookup(typo) == "https://www.rottentomatoes.com/m/series", typo
+        series.close()
+
+    # Previous searches resolve exactly as they did before
+    title_index.add_query("Bad  Boys", "https://www.rottentomatoes.com/m/bad_boys_for_life/")
+    assert title_index.lookup("bad boys") == "https://www.rottentomatoes.com/m/bad_boys_for_life"
+
+
+def test_request_resolves_offline(tmp_path, monkeypatch):
+    index.enable(str(tmp_path / "index.sqlite3"))
+    try:
+        listing = search.SearchListing(True, True, "https://www.rottentomatoes.com/m/happy_gilmore", "Happy Gilmore", "1996")
+        index.record_listings([listing])
+
+        def no_search(name):
+            raise AssertionError("searched")
+
+        fetched = []
+        monkeypatch.setattr(search, "top_movie_result", no_search)
+        monkeypatch.setattr(
+            standalone.requests, "get",
+            lambda url, headers=None: fetched.append(url) or type("Response", (), {"status_code": 200, "text": ""})
+        )
+
+        standalone._request("happy gilmore")
+        assert fetched == ["https://www.rottentomatoes.com/m/happy_gilmore"]
+    finally:
+        index.disable()
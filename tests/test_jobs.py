@@ -0,0 +1,107 @@
+import pytest
+
+pytest.importorskip("fastapi")  # importing api.jobs imports the api package
+
+from api import jobs
+from rottentomatoes import exceptions
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1, retry_backoff=0)
+
+
+def handler(name, url):
+    if name == "missing":
+        raise exceptions.LookupError("No movies found.")
+    if name == "flaky":
+        raise exceptions.TransientError("429")
+    return {"name": name.title()}
+
+
+def test_submit_and_process(queue):
+    job_id = queue.submit([("a", ""), ("missing", ""), ("b", "")])
+    assert queue.status(job_id)["queued"] == 3
+    assert queue.status("nope") is None
+
+    while queue.process_one(handler):
+        pass
+
+    status = queue.status(job_id)
+    assert (status["done"], status["failed"], status["finished"]) == (2, 1, True)
+    assert queue.results(job_id)[1] == {
+        "index": 1, "query": {"name": "missing", "url": ""}, "movie": None, "error": "LookupError: No movies found."
+    }
+
+
+def test_results_paging(queue):
+    job_id = queue.submit([(str(i), "") for i in range(5)])
+
+    queue.process_one(handler)
+    queue.process_one(handler)
+    first = queue.results(job_id, offset=0, limit=2)
+    assert [result["index"] for result in first] == [0, 1]
+
+    # Pages past the finished results fill in as items finish
+    assert queue.results(job_id, offset=2, limit=2) == []
+    while queue.process_one(handler):
+        pass
+    assert [result["index"] for result in queue.results(job_id, offset=2, limit=2)] == [2, 3]
+    assert [result["index"] for result in queue.results(job_id, offset=4)] == [4]
+
+
+def test_transient_failures_are_retried(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), retry_backoff=60)
+    job_id = queue.submit([("flaky", "")])
+
+    assert queue.process_one(handler)
+    assert queue.status(job_id)["queued"] == 1
+    assert not queue.process_one(handler)  # backing off
+
+    with queue._connect() as conn:
+        conn.execute("UPDATE items SET available_at = 0")
+    queue.process_one(handler)
+    with queue._connect() as conn:
+        conn.execute("UPDATE items SET available_at = 0")
+    queue.process_one(handler)
+
+    status = queue.status(job_id)
+    assert (status["queued"], status["failed"]) == (0, 1)
+    assert queue.results(job_id)[0]["error"] == "TransientError: 429"
+
+
+def test_recover(queue):
+    job_id = queue.submit([("a", ""), ("b", "")])
+    queue._claim()
+    queue._claim()
+
+    # One item's worker is still running it, the other's died and its lease expired
+    with queue._connect() as conn:
+        conn.execute("UPDATE items SET lease_expires = 0 WHERE idx = 1")
+
+    assert queue.recover() == 1
+    status = queue.status(job_id)
+    assert (status["running"], status["queued"]) == (1, 1)
+
+    # A restarted queue picks the recovered item up
+    restarted = jobs.JobQueue(queue.path)
+    assert restarted.process_one(handler)
+    assert restarted.results(job_id)[0]["index"] == 1
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), lease_seconds=-1, max_attempts=2)
+    job_id = queue.submit([("a", "")])
+
+    # A worker leases the item and dies, another takes it over
+    first = queue._claim()
+    assert queue.process_one(handler)
+    queue._finish(first, {"name": "Stale"}, None)  # the dead worker's lease was lost
+    assert queue.results(job_id)[0]["movie"] == {"name": "A"}
+
+    # An item whose lease expires on every attempt fails
+    job_id = queue.submit([("b", "")])
+    queue._claim()
+    queue._claim()
+    assert not queue.process_one(handler)
+    assert queue.results(job_id)[0]["error"] == "Lease expired on every attempt"
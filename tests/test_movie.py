@@ -13,3 +13,39 @@ def test_movie():
     assert all(genre in m.genres for genre in {"Action", "Adventure"})
     assert m.rating == "PG-13"
     assert m.num_of_reviews >= 482
+
+
+def _cached_movie(age: float) -> movie.Movie:
+    data = {
+        "movie_title": "Top Gun: Maverick", "synopsis": "Pete Mitchell is back.", "tomatometer": 90,
+        "audience_score": 90, "weighted_score": 90, "num_of_reviews": 100, "genres": ["Action"],
+        "url": "https://www.rottentomatoes.com/m/top_gun_maverick",
+    }
+    fetched_at = {field: movie.time.time() - age for field in data}
+    return movie.Movie.from_dict(data, fetched_at)
+
+
+def test_movie_refresh_only_volatile_fields(monkeypatch):
+    requested = []
+    monkeypatch.setattr(movie.standalone, "_request", lambda movie_name, force_url: requested.append(force_url))
+    monkeypatch.setattr(movie.standalone, "_get_score_details", lambda content: {
+        "tomatometerScore": 96, "audienceScore": 99, "num_of_reviews_tomatometer": 482, "synopsis": "Changed.",
+    })
+
+    fresh = _cached_movie(age=60)
+    assert fresh.stale_fields() == []
+    assert fresh.refresh() == []
+    assert requested == []
+
+    stale = _cached_movie(age=2 * 24 * 60 * 60)
+    assert set(stale.refresh()) == set(movie.VOLATILE_FIELDS)
+    assert requested == ["https://www.rottentomatoes.com/m/top_gun_maverick"]
+    assert (stale.tomatometer, stale.audience_score, stale.weighted_score, stale.num_of_reviews) == (96, 99, 97, 482)
+    assert stale.synopsis == "Pete Mitchell is back."
+    assert stale.stale_fields() == []
+
+    # The scores are refreshed together, so they never disagree
+    stale = _cached_movie(age=60)
+    assert sorted(stale.refresh(["tomatometer"])) == sorted(movie.SCORE_FIELDS)
+    assert (stale.tomatometer, stale.audience_score, stale.weighted_score) == (96, 99, 97)
+    assert stale.num_of_reviews == 100
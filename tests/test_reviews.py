@@ -0,0 +1,68 @@
+import threading
+
+from rottentomatoes import reviews
+
+
+REVIEWS_PAGE = """
+<div class="review-row" data-qa="review-item">
+  <a class="display-name" data-qa="review-critic-link" href="/critics/a">Jane Critic</a>
+  <a class="publication" data-qa="review-publication" href="/critics/source/1">Daily Planet</a>
+  <score-icon-critic-deprecated state="fresh"></score-icon-critic-deprecated>
+  <p class="review-text" data-qa="review-quote"> A blast. </p>
+  <p class="original-score-and-url">
+    <a href="https://example.com/review" data-qa="full-review-link">Full Review</a> | Original Score: 4/5 |
+    <span data-qa="review-date">Jun 1, 2022</span>
+  </p>
+</div>
+<div class="review-row" data-qa="review-item">
+  <score-icon-critic sentiment="NEGATIVE"></score-icon-critic>
+  <p class="review-text" data-qa="review-quote">Meh.</p>
+</div>
+"""
+
+
+def test_parse_reviews():
+    first, second = reviews.parse_reviews(REVIEWS_PAGE)
+
+    assert first == reviews.Review(
+        critic="Jane Critic", publication="Daily Planet", quote="A blast.", sentiment="fresh",
+        original_score="4/5", date="Jun 1, 2022", url="https://example.com/review",
+    )
+    assert second.sentiment == "rotten"
+    assert second.critic is None and second.original_score is None
+
+
+def test_iter_reviews_in_page_order(monkeypatch):
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch_page(movie_url, page):
+        with lock:
+            fetched.append(page)
+        if page > 5:
+            return []
+        return [reviews.Review(None, None, f"{page}-{i}", None, None, None, None) for i in range(2)]
+
+    monkeypatch.setattr(reviews, "_fetch_page", fetch_page)
+
+    quotes = [review.quote for review in reviews.iter_reviews("https://x/m/y", concurrency=3, prefetch=2)]
+    assert quotes == [f"{page}-{i}" for page in range(1, 6) for i in range(2)]
+
+    # Stopping early doesn't fetch far ahead
+    fetched.clear()
+    stream = reviews.iter_reviews("https://x/m/y", prefetch=2)
+    next(stream)
+    stream.close()
+    assert max(fetched) <= 3
+
+
+def test_iter_reviews_stops_on_repeated_page(monkeypatch):
+    page_reviews = [reviews.Review(None, None, str(i), None, None, None, None) for i in range(2)]
+    monkeypatch.setattr(reviews, "_fetch_page", lambda movie_url, page: page_reviews)
+
+    # The site ignoring the page number would otherwise loop forever
+    assert len(list(reviews.iter_reviews("https://x/m/y"))) == 2
+
+    monkeypatch.setattr(reviews, "_fetch_page", lambda movie_url, page: [page_reviews[page % 2]])
+    monkeypatch.setattr(reviews, "MAX_PAGES", 5)
+    assert len(list(reviews.iter_reviews("https://x/m/y"))) == 5
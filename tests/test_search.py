@@ -0,0 +1,32 @@
+from rottentomatoes import search
+
+
+# `str` of the search page's bytes, as `_movie_search_content` keeps it
+SEARCH_CONTENT = str(
+    '<search-page-media-row cast="Adam Sandler" releaseyear="1996" tomatometerscore="61">\n'
+    '<a href="https://www.rottentomatoes.com/m/happy_gilmore" data-qa="thumbnail-link" slot="thumbnail"></a>\n'
+    '<a href="https://www.rottentomatoes.com/m/happy_gilmore" data-qa="info-name" slot="title">\n'
+    '  Happy Gilmore\n</a></search-page-media-row>'
+    '<search-page-media-row releaseyear="2001" tomatometerscore="">'
+    '<a href="https://www.rottentomatoes.com/m/amelie" slot="title">Amélie &amp; Co</a>'
+    '</search-page-media-row>'.encode()
+)[2:-1]
+
+
+def test_search_listing_from_html(monkeypatch):
+    monkeypatch.setattr(search, "_movie_search_content", lambda name: SEARCH_CONTENT)
+    gilmore, amelie = search.search_results("happy gilmore")
+
+    assert (gilmore.title, gilmore.year, gilmore.tomatometer) == ("Happy Gilmore", "1996", 61)
+    assert gilmore.has_tomatometer and gilmore.is_movie
+    assert gilmore.url == "https://www.rottentomatoes.com/m/happy_gilmore"
+
+    assert (amelie.title, amelie.year, amelie.tomatometer) == ("Amélie & Co", "2001", None)
+    assert not amelie.has_tomatometer
+
+
+def test_hydrate_all_keeps_order(monkeypatch):
+    monkeypatch.setattr(search.SearchListing, "hydrate", lambda listing: listing.url)
+    listings = [search.SearchListing(True, True, f"https://www.rottentomatoes.com/m/{i}") for i in range(10)]
+
+    assert search.hydrate_all(listings, concurrency=3) == [listing.url for listing in listings]
@@ -0,0 +1,71 @@
+import pytest
+
+from rottentomatoes import movie
+from rottentomatoes import snapshots
+from rottentomatoes import standalone
+
+
+def movie_page(title: str, score: int) -> str:
+    return (
+        "<html><head>" + "<meta name='boilerplate'>" * 200 +
+        '<script type="application/ld+json">{"genre": ["Comedy"]}</script></head><body>'
+        f'<h1 slot="titleIntro">{title}</h1><rt-button slot="criticsScore">{score}%</rt-button>'
+        "</body></html>"
+    )
+
+
+@pytest.fixture(params=["zlib", "zstd"])
+def store(request, tmp_path):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+
+    snapshot_store = snapshots.SnapshotStore(str(tmp_path / "snapshots"), codec=request.param)
+    yield snapshot_store
+    snapshot_store.close()
+
+
+def test_save_and_load(store):
+    first = movie_page("Happy Gilmore", 61)
+    store.save("https://www.rottentomatoes.com/m/happy_gilmore", first, fetched_at=1)
+    store.save("https://www.rottentomatoes.com/m/happy_gilmore", movie_page("Happy Gilmore", 62), fetched_at=2)
+    store.save("https://www.rottentomatoes.com/m/copy", first, fetched_at=3)
+
+    assert store.latest("https://www.rottentomatoes.com/m/happy_gilmore") == movie_page("Happy Gilmore", 62)
+    assert store.latest("https://www.rottentomatoes.com/m/copy") == first
+    assert store.latest("https://www.rottentomatoes.com/m/missing") is None
+    assert len(store.snapshots(latest_only=False)) == 3
+
+    # Identical pages are stored once, and later pages compress against the dictionary
+    blobs = {snapshot.digest: snapshot.length for snapshot in store.snapshots(latest_only=False)}
+    assert len(blobs) == 2
+    assert max(blobs.values()) < len(first) / 10
+
+
+def test_reextract(store):
+    store.save("https://www.rottentomatoes.com/m/a", movie_page("A", 10))
+    store.save("https://www.rottentomatoes.com/m/b", movie_page("B", 90))
+    store.save("https://www.rottentomatoes.com/search?search=a", "<html></html>", kind="search")
+
+    records = list(snapshots.reextract(store, fields=["movie_title", "tomatometer", "genres", "directors"], workers=2))
+
+    assert [(r["movie_title"], r["tomatometer"], r["genres"]) for r in records] == [
+        ("A", 10, ["Comedy"]), ("B", 90, ["Comedy"])
+    ]
+    assert records[0]["directors"] is None and "directors" in records[0]["errors"]
+
+    # Re-extraction uses the same extractors as fetching a Movie
+    assert snapshots.EXTRACTORS is movie.EXTRACTORS
+
+
+def test_record_fetched_pages(tmp_path, monkeypatch):
+    class Response:
+        status_code = 200
+        text = movie_page("A", 10)
+
+    monkeypatch.setattr(standalone.requests, "get", lambda url, headers=None: Response)
+    snapshots.enable(str(tmp_path / "snapshots"))
+    try:
+        standalone._request("", force_url="https://www.rottentomatoes.com/m/a")
+        assert snapshots.snapshot_store.latest("https://www.rottentomatoes.com/m/a") == Response.text
+    finally:
+        snapshots.disable()